@@ -0,0 +1,283 @@
+"""Reproducible performance benchmarks for the configuration GUI.
+
+Measures, for both the eager and the lazy (--lazy) layout:
+  * window construction time and time to first idle
+  * load (load_config + update_ui_from_config) and save round-trips on
+    synthetic configs from tens to thousands of keys
+  * memory per open window (Python heap via tracemalloc, plus process RSS
+    on Linux, which includes Tk's own allocations)
+
+When no display is available on Linux, a private Xvfb server is started
+for the duration of the run. Results are written as JSON so runs from
+different versions can be compared.
+
+Usage:
+    python benchmarks/bench_gui.py --output bench_gui.json [--sizes 10 100 1000 5000]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+
+def start_xvfb():
+    """Start Xvfb on a free display and point DISPLAY at it; returns the process"""
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        raise SystemExit("No display available and Xvfb is not installed "
+                         "(e.g. apt install xvfb), or run with DISPLAY set")
+    for number in range(99, 200):
+        if not os.path.exists(f'/tmp/.X11-unix/X{number}') and not os.path.exists(f'/tmp/.X{number}-lock'):
+            break
+    process = subprocess.Popen([xvfb, f':{number}', '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket_path = f'/tmp/.X11-unix/X{number}'
+    deadline = time.time() + 10
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.time() > deadline:
+            process.kill()
+            raise SystemExit("Xvfb failed to start")
+        time.sleep(0.05)
+    os.environ['DISPLAY'] = f':{number}'
+    return process
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def synthetic_config(keys):
+    """A config with every GUI option plus ``keys`` extra options and some tables"""
+    from navidrome_config_core import DEFAULTS, build_config
+    config = build_config(DEFAULTS)
+    config['MusicFolder'] = '/music'
+    for i in range(max(0, keys - len(config))):
+        config[f'Extra{i}'] = f'value {i}'
+    for table in range(keys // 200):
+        config[f'Table{table}'] = {f'Key{i}': i for i in range(20)}
+    return config
+
+
+class Harness:
+    """Creates GUI instances against a temporary config file with dialogs silenced"""
+
+    def __init__(self, directory):
+        # The GUI opens navidrome.toml from the working directory, including
+        # from its background loader, so stay in the scratch directory
+        os.chdir(directory)
+        import tkinter as tk
+        from tkinter import messagebox
+        import navidrome_config_gui as gui
+
+        self.tk = tk
+        self.gui = gui
+        self.directory = directory
+        # Modal dialogs would block the benchmark
+        for name in ('showinfo', 'showwarning', 'showerror'):
+            setattr(messagebox, name, lambda *args, **kwargs: None)
+        messagebox.askyesno = lambda *args, **kwargs: True
+
+    def write_config(self, keys):
+        import toml
+        path = os.path.join(self.directory, f'navidrome-{keys}.toml')
+        with open(path, 'w', encoding='utf-8') as f:
+            toml.dump(synthetic_config(keys), f)
+        return path
+
+    def open_window(self, config_file, lazy):
+        """Build a window for ``config_file``; returns (root, app, construct seconds)"""
+        shutil.copyfile(config_file, os.path.join(self.directory, 'navidrome.toml'))
+        root = self.tk.Tk()
+        start = time.perf_counter()
+        app = self.gui.NavidromeConfigGUI(root, lazy=lazy)
+        return root, app, time.perf_counter() - start
+
+    def close_window(self, root, app):
+        # Stops the file watcher and the validation pool, then destroys root
+        app.close()
+
+    def wait_first_idle(self, root, app):
+        """Run the event loop until the window's first idle callback has fired"""
+        deadline = time.perf_counter() + 30
+        while app.first_paint_seconds is None and time.perf_counter() < deadline:
+            root.update()
+        return app.first_paint_seconds
+
+    def wait_loaded(self, root, app):
+        """In lazy mode, run the event loop until the background load has finished"""
+        deadline = time.perf_counter() + 30
+        while str(app.save_button.cget('state')) == 'disabled' and time.perf_counter() < deadline:
+            root.update()
+            time.sleep(0.001)
+
+
+def bench_startup(harness, config_file, lazy, repeat):
+    construct, first_idle = [], []
+    for _ in range(repeat):
+        root, app, seconds = harness.open_window(config_file, lazy)
+        construct.append(seconds)
+        first_idle.append(harness.wait_first_idle(root, app))
+        harness.close_window(root, app)
+    return {
+        'construct_ms': statistics.median(construct) * 1000,
+        'first_idle_ms': statistics.median(first_idle) * 1000,
+    }
+
+
+def bench_round_trip(harness, config_file, lazy, repeat):
+    """Time load + UI sync and save (after editing one option) on an open window"""
+    root, app, _ = harness.open_window(config_file, lazy)
+    harness.wait_first_idle(root, app)
+    if lazy:
+        harness.wait_loaded(root, app)
+        # Build every tab so all variables exist, as after a user has looked around
+        for tab in app.notebook.tabs():
+            app.notebook.select(tab)
+            root.update()
+
+    load, save, save_unchanged = [], [], []
+    for i in range(repeat):
+        start = time.perf_counter()
+        app.load_config()
+        app.update_ui_from_config()
+        load.append(time.perf_counter() - start)
+
+        app.set_value('Port', 5000 + i % 2)
+        start = time.perf_counter()
+        app.save_config()
+        save.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        app.save_config()
+        save_unchanged.append(time.perf_counter() - start)
+        root.update()
+    harness.close_window(root, app)
+    return {
+        'load_ms': statistics.median(load) * 1000,
+        'save_ms': statistics.median(save) * 1000,
+        'save_unchanged_ms': statistics.median(save_unchanged) * 1000,
+    }
+
+
+def bench_memory(harness, config_file, lazy, windows):
+    """Average memory added by each open window
+
+    RSS and the traced Python heap are measured in separate passes so
+    tracemalloc's own bookkeeping doesn't inflate the RSS figure.
+    """
+    def open_windows():
+        opened = []
+        for _ in range(windows):
+            root, app, _ = harness.open_window(config_file, lazy)
+            harness.wait_first_idle(root, app)
+            opened.append((root, app))
+        gc.collect()
+        return opened
+
+    def close_windows(opened):
+        for root, app in opened:
+            harness.close_window(root, app)
+        gc.collect()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    opened = open_windows()
+    rss_after = rss_bytes()
+    close_windows(opened)
+
+    tracemalloc.start()
+    opened = open_windows()
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    close_windows(opened)
+
+    result = {'python_heap_bytes_per_window': python_bytes / windows}
+    if rss_before is not None and rss_after is not None:
+        result['rss_bytes_per_window'] = (rss_after - rss_before) / windows
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GUI startup, load/save and UI sync")
+    parser.add_argument('--output', default='bench_gui.json', help="JSON file to write results to")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="number of keys in the synthetic configs")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement (median is reported)")
+    parser.add_argument('--windows', type=int, default=3, help="windows opened for the memory measurement")
+    parser.add_argument('--no-xvfb', action='store_true', help="never start Xvfb, use DISPLAY as is")
+    args = parser.parse_args(argv)
+
+    xvfb = None
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY') and not args.no_xvfb:
+        xvfb = start_xvfb()
+
+    previous_cwd = os.getcwd()
+    output = os.path.abspath(args.output)
+    try:
+        import tkinter
+        results = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'tk': tkinter.TkVersion,
+            'platform': platform.platform(),
+            'xvfb': xvfb is not None,
+            'repeat': args.repeat,
+            'modes': {},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            harness = Harness(directory)
+            smallest = harness.write_config(min(args.sizes))
+            for mode, lazy in (('eager', False), ('lazy', True)):
+                print(f"[{mode}] startup...", file=sys.stderr)
+                mode_results = {
+                    'startup': bench_startup(harness, smallest, lazy, args.repeat),
+                    'memory': bench_memory(harness, smallest, lazy, args.windows),
+                    'round_trip': {},
+                }
+                for keys in args.sizes:
+                    print(f"[{mode}] round trip with {keys} keys...", file=sys.stderr)
+                    config_file = harness.write_config(keys)
+                    mode_results['round_trip'][str(keys)] = bench_round_trip(harness, config_file,
+                                                                             lazy, args.repeat)
+                results['modes'][mode] = mode_results
+    finally:
+        os.chdir(previous_cwd)
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
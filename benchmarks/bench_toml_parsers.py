@@ -0,0 +1,86 @@
+"""Micro-benchmark of the TOML parser backends and the config document cache.
+
+Times every available backend (tomllib, toml) on a typical small
+navidrome.toml and on a very large synthetic one, then times a cold and a
+warm load through the shared document cache.
+
+Usage:
+    python benchmarks/bench_toml_parsers.py [--keys 20000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from navidrome_config_cache import ConfigCache, available_backends, get_parser
+from navidrome_config_core import DEFAULTS, build_config
+from navidrome_config_writer import atomic_write_text
+
+import toml
+
+
+def small_config_text():
+    """The file the GUI writes with every option at its default"""
+    return toml.dumps(build_config(DEFAULTS))
+
+
+def large_config_text(keys):
+    """Lots of top-level keys, commented-out options and tables"""
+    lines = ['# Synthetic navidrome.toml for benchmarking', small_config_text()]
+    for i in range(keys):
+        lines.append(f'# Option{i} = "commented out"')
+        lines.append(f'Option{i} = "value {i}"')
+    for table in range(keys // 100):
+        lines.append(f'\n[Table{table}]')
+        lines.extend(f'Key{i} = {i}' for i in range(50))
+    return '\n'.join(lines) + '\n'
+
+
+def best_time(func, repeat):
+    """Fastest single run in milliseconds"""
+    number = 1
+    while timeit.timeit(func, number=number) < 0.05 and number < 100000:
+        number *= 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=20000, help="top-level keys in the large file")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    documents = {
+        'small': small_config_text(),
+        'large': large_config_text(args.keys),
+    }
+
+    print(f"{'Backend':<10}{'File':<8}{'Size':>10}{'Parse ms':>12}")
+    for backend in available_backends():
+        loads = get_parser(backend)
+        for name, text in documents.items():
+            ms = best_time(lambda: loads(text), args.repeat)
+            print(f"{backend:<10}{name:<8}{len(text):>10,}{ms:>12.3f}")
+
+    print()
+    print(f"{'Cache':<18}{'File':<8}{'Load ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, text in documents.items():
+            path = os.path.join(directory, f'{name}.toml')
+            atomic_write_text(path, text)
+            # Age the file past the cache's "recently modified" window
+            os.utime(path, (0, 0))
+            cache = ConfigCache()
+            cold = best_time(lambda: (cache.invalidate(), cache.get(path)), args.repeat)
+            cache.get(path)
+            warm = best_time(lambda: cache.get(path), args.repeat)
+            print(f"{'cold (' + cache.backend + ')':<18}{name:<8}{cold:>12.3f}")
+            print(f"{'warm':<18}{name:<8}{warm:>12.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Transcoding cache hit-rate simulator for sizing TranscodingCacheSize.
+
+Replays a play history through an LRU model of the cache, evaluating every
+candidate size in one pass from LRU stack distances.
+"""
+import argparse
+import bisect
+import csv
+import re
+import sys
+import time
+from array import array
+
+from navidrome_config_core import CHOICES, DEFAULTS, FORMAT_BITRATES, format_size, parse_size
+
+# Used when the history does not record how long a track is
+DEFAULT_DURATION = 240.0
+
+# Navidrome log lines for transcoded streams, e.g.
+#   level=debug msg="Streaming TRANSCODED file" id=2f6a... path=...
+# "Streaming RAW file" lines are skipped: raw streams bypass the cache
+STREAM_LOG_RE = re.compile(r'msg="Streaming TRANSCODED[^"]*".*?\bid=("?)([^"\s]+)\1')
+DURATION_LOG_RE = re.compile(r'\bduration=("?)([0-9.]+)')
+
+# Accepted CSV column names
+ID_COLUMNS = ('track_id', 'media_file_id', 'id', 'track')
+DURATION_COLUMNS = ('duration', 'duration_seconds', 'seconds', 'length')
+
+
+class PlayHistory:
+    """Sequence of plays stored as track indexes, plus one duration per track"""
+
+    def __init__(self):
+        self.events = array('l')
+        self.durations = array('d')
+        self._track_index = {}
+
+    def add(self, track_id, duration=None):
+        index = self._track_index.get(track_id)
+        if index is None:
+            index = len(self.durations)
+            self._track_index[track_id] = index
+            self.durations.append(duration or DEFAULT_DURATION)
+        elif duration:
+            self.durations[index] = duration
+        self.events.append(index)
+
+    @property
+    def track_count(self):
+        return len(self.durations)
+
+    def __len__(self):
+        return len(self.events)
+
+
+def _parse_duration(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_csv_history(path, history=None):
+    """Read plays from a CSV export with a track id and (optionally) a duration column"""
+    history = history or PlayHistory()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        id_col = next((header.index(c) for c in ID_COLUMNS if c in header), None)
+        dur_col = next((header.index(c) for c in DURATION_COLUMNS if c in header), None)
+        if id_col is None:
+            raise ValueError(f"CSV needs one of these columns: {', '.join(ID_COLUMNS)}")
+        add = history.add
+        for row in reader:
+            if len(row) <= id_col:
+                continue
+            duration = _parse_duration(row[dur_col]) if dur_col is not None and dur_col < len(row) else None
+            add(row[id_col], duration)
+    return history
+
+
+def load_log_history(path, history=None):
+    """Read transcoded plays from a Navidrome log file ("Streaming TRANSCODED ..." lines)"""
+    history = history or PlayHistory()
+    add = history.add
+    search = STREAM_LOG_RE.search
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if 'Streaming TRANSCODED' not in line:
+                continue
+            match = search(line)
+            if match:
+                duration_match = DURATION_LOG_RE.search(line)
+                add(match.group(2), float(duration_match.group(2)) if duration_match else None)
+    return history
+
+
+def load_history(path):
+    """Load a play history, choosing the parser from the file extension"""
+    if path.lower().endswith('.csv'):
+        return load_csv_history(path)
+    return load_log_history(path)
+
+
+def stack_distances(history, track_bytes):
+    """LRU stack distance in bytes for every repeat play
+
+    Returns ``(distances, sizes, first_plays, first_play_bytes)`` where
+    ``distances[k]`` and ``sizes[k]`` describe the k-th repeat play.
+    """
+    events = history.events
+    n = len(events)
+    # Fenwick tree over event positions: holds a track's size at the
+    # position of its most recent play, 0 elsewhere
+    tree = array('q', bytes(8 * (n + 1)))
+    last = array('l', [-1]) * history.track_count
+    distances = array('q')
+    sizes = array('q')
+    first_plays = 0
+    first_play_bytes = 0
+
+    for t, track in enumerate(events):
+        size = track_bytes[track]
+        previous = last[track]
+        if previous < 0:
+            first_plays += 1
+            first_play_bytes += size
+        else:
+            # Bytes of distinct tracks played after ``previous`` and before t
+            # (prefix(t) - prefix(previous + 1), stopping where the two
+            # prefix walks meet since the rest cancels out)
+            total = 0
+            i = t
+            j = previous + 1
+            while i != j:
+                if i > j:
+                    total += tree[i]
+                    i &= i - 1
+                else:
+                    total -= tree[j]
+                    j &= j - 1
+            distances.append(total + size)
+            sizes.append(size)
+            # Remove the track from its old position
+            i = previous + 1
+            while i <= n:
+                tree[i] -= size
+                i += i & -i
+        i = t + 1
+        while i <= n:
+            tree[i] += size
+            i += i & -i
+        last[track] = t
+
+    return distances, sizes, first_plays, first_play_bytes
+
+
+def simulate(history, cache_sizes, transcoding_format=DEFAULTS['TranscodingFormat'], bitrate=None):
+    """Simulate each cache size, returning one result dict per size (in the given order)
+
+    Each result has ``cache_size`` (as given), ``cache_bytes``, ``hits``,
+    ``misses``, ``hit_rate``, ``transcoded_bytes`` (all misses) and
+    ``retranscoded_bytes`` (misses on tracks that had been played before).
+    """
+    bitrate = bitrate or FORMAT_BITRATES[transcoding_format]
+    bytes_per_second = bitrate * 1000 / 8
+    track_bytes = array('q', (int(d * bytes_per_second) for d in history.durations))
+
+    distances, sizes, first_plays, first_play_bytes = stack_distances(history, track_bytes)
+
+    # Sort repeat plays by distance with a running total of their sizes, so
+    # the hits for any cache size are a prefix
+    order = sorted(range(len(distances)), key=distances.__getitem__)
+    sorted_distances = [distances[k] for k in order]
+    cumulative_bytes = array('q', [0])
+    running = 0
+    for k in order:
+        running += sizes[k]
+        cumulative_bytes.append(running)
+    repeat_bytes = running
+
+    results = []
+    total = len(history)
+    for cache_size in cache_sizes:
+        cache_bytes = parse_size(cache_size)
+        hits = bisect.bisect_right(sorted_distances, cache_bytes)
+        hit_bytes = cumulative_bytes[hits]
+        results.append({
+            'cache_size': cache_size,
+            'cache_bytes': cache_bytes,
+            'hits': hits,
+            'misses': total - hits,
+            'hit_rate': hits / total if total else 0.0,
+            'transcoded_bytes': first_play_bytes + repeat_bytes - hit_bytes,
+            'retranscoded_bytes': repeat_bytes - hit_bytes,
+        })
+    return results
+
+
+def recommend_size(results, tolerance=0.01):
+    """Smallest cache size whose hit rate is within ``tolerance`` of the best one"""
+    if not results:
+        return None
+    best = max(result['hit_rate'] for result in results)
+    candidates = [r for r in results if r['hit_rate'] >= best - tolerance]
+    return min(candidates, key=lambda r: r['cache_bytes'])['cache_size']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Estimate transcoding cache hit rates from a Navidrome log or CSV play history")
+    parser.add_argument('history', help="Navidrome log file, or a .csv with track_id[,duration] columns")
+    parser.add_argument('-f', '--format', default=DEFAULTS['TranscodingFormat'],
+                        choices=sorted(FORMAT_BITRATES), help="transcoding format")
+    parser.add_argument('-b', '--bitrate', type=int, help="override the format's bitrate (kbps)")
+    parser.add_argument('-s', '--size', dest='sizes', action='append',
+                        help="cache size to test, e.g. 300MiB; may be repeated "
+                             "(default: the sizes offered by the GUI)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    history = load_history(args.history)
+    loaded = time.perf_counter()
+    results = simulate(history, args.sizes or CHOICES['TranscodingCacheSize'], args.format, args.bitrate)
+    done = time.perf_counter()
+
+    print(f"{len(history):,} plays of {history.track_count:,} tracks "
+          f"(loaded in {loaded - start:.2f} s, simulated in {done - loaded:.2f} s)")
+    print(f"{'Cache':>10}  {'Hit rate':>8}  {'Transcoded':>12}  {'Re-transcoded':>13}")
+    for result in results:
+        print(f"{result['cache_size']:>10}  {result['hit_rate']:>8.1%}  "
+              f"{format_size(result['transcoded_bytes']):>12}  "
+              f"{format_size(result['retranscoded_bytes']):>13}")
+    recommended = recommend_size(results)
+    if recommended:
+        print(f"Recommended TranscodingCacheSize: {recommended}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Headless batch tool for applying configuration overrides to many navidrome.toml files.
+
+Example:
+    python navidrome_config_batch.py --set Port=4600 --set EnableDownloads=false \\
+        "/srv/navidrome/*/navidrome.toml"
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from navidrome_config_core import (DEFAULTS, build_config, coerce_value, load_config_file,
+                                   merge_config, validate_config)
+from navidrome_config_writer import render_config, write_config_file
+
+
+def parse_overrides(assignments):
+    """Parse ``Key=Value`` strings into a dictionary of typed overrides"""
+    overrides = {}
+    for assignment in assignments:
+        key, sep, value = assignment.partition('=')
+        key = key.strip()
+        if not sep or not key:
+            raise ValueError(f"Override must look like Key=Value, got {assignment!r}")
+        if key not in DEFAULTS:
+            raise ValueError(f"Unknown option {key!r}")
+        overrides[key] = coerce_value(key, value.strip())
+    return overrides
+
+
+def expand_targets(patterns):
+    """Expand file names and glob patterns into a sorted, de-duplicated list of paths"""
+    targets = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if matches:
+            targets.update(matches)
+        elif not glob.has_magic(pattern):
+            # Plain paths that do not exist yet are created from defaults
+            targets.add(pattern)
+    return sorted(os.path.normpath(target) for target in targets)
+
+
+def apply_to_file(path, overrides, dry_run=False):
+    """Load, merge, validate and write a single config file
+
+    Returns a ``(path, ok, message, seconds)`` tuple so results can be
+    collected from worker processes.
+    """
+    start = time.perf_counter()
+    try:
+        # Existing files keep everything not overridden, and only the
+        # overrides are checked; new ones start from defaults and are
+        # checked in full
+        exists = os.path.exists(path)
+        base = load_config_file(path) if exists else build_config({})
+        config = merge_config(base, overrides)
+        validate_config(config, overrides if exists else None)
+        if dry_run:
+            current_text, new_text = render_config(path, config)
+            message = "validated, unchanged" if new_text == current_text else "validated, would write"
+        elif write_config_file(path, config):
+            message = "written"
+        else:
+            message = "unchanged, not written"
+        return path, True, message, time.perf_counter() - start
+    except Exception as e:
+        return path, False, str(e), time.perf_counter() - start
+
+
+def apply_to_files(paths, overrides, workers=None, use_processes=False, dry_run=False):
+    """Apply overrides to every path in parallel, yielding results as they complete"""
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        futures = [executor.submit(apply_to_file, path, overrides, dry_run) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply Navidrome configuration overrides to many TOML files without a GUI")
+    parser.add_argument('targets', nargs='+',
+                        help="navidrome.toml files or glob patterns (quote globs to avoid shell expansion)")
+    parser.add_argument('-s', '--set', dest='overrides', action='append', default=[],
+                        metavar='KEY=VALUE', help="option to override; may be repeated")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of parallel workers (default: based on CPU count)")
+    parser.add_argument('--processes', action='store_true',
+                        help="use a process pool instead of a thread pool")
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help="load, merge and validate without writing anything")
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = parse_overrides(args.overrides)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = expand_targets(args.targets)
+    if not paths:
+        print("No matching configuration files found", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    failures = 0
+    for path, ok, message, seconds in apply_to_files(paths, overrides, args.workers,
+                                                     args.processes, args.dry_run):
+        status = "OK  " if ok else "FAIL"
+        print(f"{status} {seconds * 1000:8.2f} ms  {path}: {message}")
+        if not ok:
+            failures += 1
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths) - failures}/{len(paths)} files succeeded in {elapsed:.2f} s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
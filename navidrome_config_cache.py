@@ -0,0 +1,139 @@
+"""Shared, cached TOML document layer for the GUI, the batch CLI and the writer.
+
+A repeat load of an unchanged file costs one ``os.stat``; parsing uses
+``tomllib`` when available, otherwise the ``toml`` package.
+"""
+import hashlib
+import importlib
+import importlib.util
+import os
+import threading
+import time
+
+# Parser modules in order of preference; each provides loads(str) -> dict
+BACKENDS = ('tomllib', 'toml')
+
+# Files modified more recently than this are verified by hash, not by stat
+RACY_SECONDS = 2.0
+
+
+def backend_available(name):
+    """True if the parser backend's module can be imported"""
+    return importlib.util.find_spec(name) is not None
+
+
+def available_backends():
+    return [name for name in BACKENDS if backend_available(name)]
+
+
+def default_backend():
+    """Name of the fastest available backend"""
+    names = available_backends()
+    if not names:
+        raise ImportError("No TOML parser available; install one with: pip install toml")
+    return names[0]
+
+
+def get_parser(name=None):
+    """Return a ``loads(text) -> dict`` function for a backend (default: fastest available)"""
+    return importlib.import_module(name or default_backend()).loads
+
+
+class ConfigDocument:
+    """One version of a config file: its text, content hash and parsed data
+
+    ``data`` is shared between callers and must not be modified; use
+    :meth:`config` for a copy that can be.
+    """
+
+    def __init__(self, path, text, digest, data, mtime_ns, size, backend):
+        self.path = path
+        self.text = text
+        self.digest = digest
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.backend = backend
+
+    def config(self):
+        """Top-level copy of the parsed data that callers may modify"""
+        return dict(self.data)
+
+
+class ConfigCache:
+    """Per-path cache of parsed config documents, safe to use from several threads"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or default_backend()
+        self._loads = get_parser(self.backend)
+        self._documents = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.parses = 0
+
+    def parse(self, text):
+        """Parse TOML text with this cache's backend"""
+        return self._loads(text)
+
+    def get(self, path):
+        """Return the ConfigDocument for ``path``; raises FileNotFoundError if missing"""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._documents.get(key)
+        if (cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size
+                and time.time() - stat.st_mtime_ns / 1e9 > RACY_SECONDS):
+            self.hits += 1
+            return cached
+
+        with open(key, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached.digest == digest:
+            # Touched or recently written but unchanged: keep the parsed data
+            document = ConfigDocument(key, cached.text, digest, cached.data,
+                                      stat.st_mtime_ns, stat.st_size, cached.backend)
+            self.hits += 1
+        else:
+            # Keep line endings as they are on disk so the writer can preserve them
+            text = raw.decode('utf-8')
+            document = ConfigDocument(key, text, digest, self.parse(text),
+                                      stat.st_mtime_ns, stat.st_size, self.backend)
+            self.parses += 1
+        with self._lock:
+            self._documents[key] = document
+        return document
+
+    def invalidate(self, path=None):
+        """Forget one path, or everything"""
+        with self._lock:
+            if path is None:
+                self._documents.clear()
+            else:
+                self._documents.pop(os.path.abspath(path), None)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """The process-wide cache shared by load, view and save"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ConfigCache()
+        return _default_cache
+
+
+def load_document(path):
+    """Cached ConfigDocument for ``path``, or None if the file does not exist"""
+    try:
+        return default_cache().get(path)
+    except FileNotFoundError:
+        return None
+
+
+def parse_toml(text):
+    """Parse TOML text with the fastest available backend"""
+    return default_cache().parse(text)
@@ -0,0 +1,207 @@
+"""Navidrome configuration defaults and build logic shared by the GUI and the batch CLI."""
+from collections import namedtuple
+
+from navidrome_config_cache import load_document
+
+# One entry per option: drives widget creation, loading and saving.
+#   widget   -- 'combo', 'entry', 'check', 'folder' or 'file'
+#   optional -- left out of the file when empty
+#   browse   -- file dialog filter for 'file' widgets
+Field = namedtuple('Field', 'key label section default widget choices optional width browse')
+
+
+def field(key, label, section, default, widget='entry', choices=None, optional=False,
+          width=15, browse=None):
+    """Create a schema entry with the usual defaults filled in"""
+    return Field(key, label, section, default, widget, choices, optional, width, browse)
+
+
+# Section id, frame title and tab title, in display order
+SECTIONS = [
+    ('general', "General Settings", "General"),
+    ('paths', "Music & Media Paths", "Paths"),
+    ('scanning', "Library Scanning", "Scanning"),
+    ('transcoding', "Audio Transcoding", "Transcoding"),
+    ('web', "Web Interface", "Web Interface"),
+    ('security', "Security & Authentication", "Security"),
+    ('advanced', "Advanced Options", "Advanced"),
+]
+
+# Every option the GUI manages, in the order they are written
+FIELDS = [
+    # General settings
+    field('LogLevel', "Log Level", 'general', 'INFO', 'combo',
+          choices=['DEBUG', 'INFO', 'WARN', 'ERROR']),
+    field('Port', "Port", 'general', 4533),
+    field('Address', "Address", 'general', '0.0.0.0', width=20),
+    field('DataFolder', "Data Folder", 'general', './data', 'folder', width=30),
+    
+    # Paths
+    field('MusicFolder', "Music Folder", 'paths', '', 'folder', optional=True, width=40),
+    field('FFmpegPath', "FFmpeg Path", 'paths', '', 'file', optional=True, width=40,
+          browse=[("Executable", "*.exe"), ("All files", "*.*")]),
+    
+    # Scanning
+    field('ScanSchedule', "Scan Schedule", 'scanning', '@every 24h', 'combo', width=20,
+          choices=['@every 1h', '@every 6h', '@every 12h', '@every 24h',
+                   '@every 48h', '@weekly', '@monthly', 'manual']),
+    field('AutoScan', "Auto Scan", 'scanning', True, 'check'),
+    field('ScanAtStartup', "Scan at Startup", 'scanning', True, 'check'),
+    
+    # Transcoding
+    field('TranscodingCacheSize', "Cache Size", 'transcoding', '150MiB', 'combo',
+          choices=['50MiB', '100MiB', '150MiB', '200MiB', '500MiB', '1GiB']),
+    field('EnableTranscoding', "Enable Transcoding", 'transcoding', True, 'check'),
+    field('TranscodingFormat', "Default Format", 'transcoding', 'mp3', 'combo',
+          choices=['mp3', 'aac', 'ogg', 'opus']),
+    
+    # Web interface
+    field('EnableWebInterface', "Enable Web Interface", 'web', True, 'check'),
+    field('Theme', "Theme", 'web', 'default', 'combo', choices=['default', 'dark', 'light']),
+    field('EnableDownloads', "Enable Downloads", 'web', True, 'check'),
+    
+    # Security
+    field('EnableAuthentication', "Enable Authentication", 'security', True, 'check'),
+    field('SessionTimeout', "Session Timeout (hours)", 'security', 24),
+    field('EnableRegistration', "Enable User Registration", 'security', False, 'check'),
+    
+    # Advanced
+    field('DbPath', "Database Path", 'advanced', './navidrome.db', 'file', width=30,
+          browse=[("Database files", "*.db"), ("All files", "*.*")]),
+    field('LogFile', "Log File", 'advanced', '', 'file', optional=True, width=30,
+          browse=[("Log files", "*.log"), ("All files", "*.*")]),
+    field('VerboseLogging', "Verbose Logging", 'advanced', False, 'check'),
+]
+
+FIELDS_BY_KEY = {f.key: f for f in FIELDS}
+
+# Default value for every option the GUI manages
+DEFAULTS = {f.key: f.default for f in FIELDS}
+
+# Options that are left out of the file when empty
+OPTIONAL_KEYS = tuple(f.key for f in FIELDS if f.optional)
+
+# Allowed values for options backed by a readonly combobox
+CHOICES = {f.key: f.choices for f in FIELDS if f.choices}
+
+
+def section_fields(section):
+    """Schema entries belonging to a section, in display order"""
+    return [f for f in FIELDS if f.section == section]
+
+
+def display_value(key, value):
+    """Convert a config value to what its Tk variable holds (bool or str)"""
+    if isinstance(DEFAULTS[key], bool):
+        return bool(value)
+    return str(value)
+
+
+# Navidrome's default bitrate (kbps) for each built-in transcoding format
+FORMAT_BITRATES = {
+    'mp3': 192,
+    'aac': 256,
+    'ogg': 192,
+    'opus': 128,
+}
+
+# Byte multipliers for size strings such as TranscodingCacheSize
+SIZE_UNITS = {
+    'B': 1,
+    'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4,
+    'KIB': 1024, 'MIB': 1024 ** 2, 'GIB': 1024 ** 3, 'TIB': 1024 ** 4,
+}
+
+
+def parse_size(text):
+    """Convert a size string like '150MiB' or '1GB' to a number of bytes"""
+    text = str(text).strip()
+    number = text.rstrip('KMGTBkmgtbiI ')
+    unit = text[len(number):].strip().upper() or 'B'
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {text!r}")
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def format_size(num_bytes):
+    """Format a byte count for display, e.g. '1.5 GiB'"""
+    size = float(num_bytes)
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if abs(size) < 1024 or unit == 'TiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def coerce_value(key, value):
+    """Convert a raw value (e.g. a widget or command-line string) to the option's type"""
+    default = DEFAULTS.get(key)
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in ('true', '1', 'yes', 'on'):
+                return True
+            if lowered in ('false', '0', 'no', 'off'):
+                return False
+            raise ValueError(f"{key} must be true or false, got {value!r}")
+        return bool(value)
+    if isinstance(default, int):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be an integer, got {value!r}")
+    return value
+
+
+def build_config(values):
+    """Build the configuration dictionary written to navidrome.toml
+
+    ``values`` maps option names to raw values; missing options fall back to
+    their defaults and empty optional paths are omitted.
+    """
+    config = {}
+    for key, default in DEFAULTS.items():
+        value = values.get(key, default)
+        if key in OPTIONAL_KEYS and not value:
+            continue
+        config[key] = coerce_value(key, value)
+    return config
+
+
+def merge_config(base, changes):
+    """Return a copy of ``base`` with ``changes`` applied
+
+    Keys not mentioned in ``changes`` (including ones the GUI does not know
+    about) are kept as they are; empty optional paths are removed.
+    """
+    config = dict(base)
+    for key, value in changes.items():
+        if key in OPTIONAL_KEYS and not value:
+            config.pop(key, None)
+        else:
+            config[key] = coerce_value(key, value)
+    return config
+
+
+def validate_config(config, keys=None):
+    """Raise ValueError if a built configuration contains invalid values
+
+    Only the options in ``keys`` are checked when it is given, so values
+    Navidrome accepts but the GUI doesn't offer (e.g. ``LogLevel = "debug"``)
+    are left alone unless they are being changed.
+    """
+    checked = config if keys is None else {key: config[key] for key in keys if key in config}
+    port = checked.get('Port')
+    if port is not None and not 1 <= port <= 65535:
+        raise ValueError(f"Port must be between 1 and 65535, got {port}")
+    timeout = checked.get('SessionTimeout')
+    if timeout is not None and timeout <= 0:
+        raise ValueError(f"SessionTimeout must be positive, got {timeout}")
+    for key, choices in CHOICES.items():
+        if key in checked and str(checked[key]).upper() not in (choice.upper() for choice in choices):
+            raise ValueError(f"{key} must be one of {', '.join(choices)}, got {checked[key]!r}")
+
+
+def load_config_file(path):
+    """Read a TOML file (through the shared document cache), returning an empty dict if it does not exist"""
+    document = load_document(path)
+    return document.config() if document is not None else {}
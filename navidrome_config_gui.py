@@ -1,25 +1,106 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-import toml
+from tkinter import ttk, filedialog, messagebox
+import tkinter.font as tkfont
 import os
 import sys
+import time
+import queue
+import argparse
+import threading
 from pathlib import Path
 
+from navidrome_config_core import (CHOICES, DEFAULTS, FIELDS_BY_KEY, OPTIONAL_KEYS, SECTIONS,
+                                   build_config, coerce_value, display_value, load_config_file,
+                                   merge_config, format_size, section_fields, validate_config)
+from navidrome_config_cache import backend_available, load_document, parse_toml
+from navidrome_config_writer import atomic_write_text, render_config, write_config_file
+from navidrome_db_analyzer import DatabaseAnalyzer
+from navidrome_cache_sim import load_history, recommend_size, simulate
+from navidrome_ffmpeg_bench import FFmpegBenchmark, find_sample_tracks, format_streams
+from navidrome_file_watch import FileWatcher
+from navidrome_log_index import LEVEL_CODES, LEVELS, LogIndex
+from navidrome_library import LibraryAnalyzer, estimate_scan, format_duration
+from navidrome_library_snapshot import SnapshotScanner, load_history as load_churn_history
+from navidrome_monitor import ServerPoller, format_latency, server_base_url
+from navidrome_tk_trace import DEFAULT_THRESHOLD_MS, TRACE_ENV, enable as enable_tracing
+from navidrome_toml_sync import TomlTextModel, error_line, highlight_spans
+from navidrome_validation import CHECKS, DEPENDENTS, ERROR, OK, ValidationEngine
+
 class NavidromeConfigGUI:
-    def __init__(self, root):
+    # How often results posted by background threads are picked up (ms)
+    UI_POLL_MS = 50
+    
+    # Quiet time after the last keystroke before a field is validated (ms)
+    VALIDATION_DEBOUNCE_MS = 400
+    
+    def __init__(self, root, lazy=False):
+        self._start_time = time.perf_counter()
+        self.first_paint_seconds = None
+        
         self.root = root
         self.root.title("Navidrome Configuration GUI")
         self.root.geometry("800x700")
         self.root.resizable(True, True)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         
         # Configuration data
         self.config = {}
         self.config_file = "navidrome.toml"
         
-        # Create main frame with scrollbar
+        # Tk variable per option key, the config last pushed into them and
+        # the keys edited since then
+        self.vars = {}
+        self._synced_config = {}
+        self._dirty = set()
+        self._syncing = False
+        
+        # Callbacks queued by background threads for the Tk thread
+        self.lazy = lazy
+        self._ui_queue = queue.Queue()
+        
+        # Watches the open file for edits made by other programs
+        self.watcher = None
+        
+        # Open raw TOML editor, kept in sync with the form
+        self.toml_editor = None
+        
+        # Inline status per checked field; checks run on the engine's workers
+        self.validation = ValidationEngine(
+            lambda *result: self.post_to_ui(self._show_validation, *result))
+        self._validation_labels = {}
+        self._validation_pending = {}
+        
+        # Status bar (packed first so it keeps its space when the window shrinks)
+        self.status_var = tk.StringVar()
+        ttk.Label(root, textvariable=self.status_var, anchor=tk.W, 
+                  padding=(10, 0, 10, 5)).pack(side=tk.BOTTOM, fill=tk.X)
+        
         main_frame = ttk.Frame(root)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        if lazy:
+            self.create_lazy_layout(main_frame)
+        else:
+            self.create_scrolling_layout(main_frame)
+        
+        self.root.after_idle(self._record_first_paint)
+        self._poll_ui_queue()
+    
+    def section_builders(self):
+        """Tab titles and builder methods for each configuration section"""
+        builders = {
+            'general': self.create_general_section,
+            'paths': self.create_paths_section,
+            'scanning': self.create_scanning_section,
+            'transcoding': self.create_transcoding_section,
+            'web': self.create_web_interface_section,
+            'security': self.create_security_section,
+            'advanced': self.create_advanced_section,
+        }
+        return [(tab_title, builders[section]) for section, _, tab_title in SECTIONS]
+    
+    def create_scrolling_layout(self, main_frame):
+        """Build every section up front in a single scrolling page"""
         # Create canvas and scrollbar
         canvas = tk.Canvas(main_frame)
         scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
@@ -40,28 +121,14 @@ class NavidromeConfigGUI:
         
         # Load existing config
         self.load_config()
+        self._synced_config = self.config
         
         # Create configuration sections
-        self.create_general_section(scrollable_frame)
-        self.create_paths_section(scrollable_frame)
-        self.create_scanning_section(scrollable_frame)
-        self.create_transcoding_section(scrollable_frame)
-        self.create_web_interface_section(scrollable_frame)
-        self.create_security_section(scrollable_frame)
-        self.create_advanced_section(scrollable_frame)
+        for _, builder in self.section_builders():
+            builder(scrollable_frame)
         
         # Buttons
-        button_frame = ttk.Frame(scrollable_frame)
-        button_frame.pack(pady=20, fill=tk.X)
-        
-        ttk.Button(button_frame, text="Save Configuration", 
-                  command=self.save_config).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(button_frame, text="Load Configuration", 
-                  command=self.load_config_file).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(button_frame, text="Reset to Defaults", 
-                  command=self.reset_to_defaults).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(button_frame, text="View Raw TOML", 
-                  command=self.view_raw_toml).pack(side=tk.LEFT)
+        self.create_buttons(scrollable_frame)
         
         # Pack canvas and scrollbar
         canvas.pack(side="left", fill="both", expand=True)
@@ -69,7 +136,103 @@ class NavidromeConfigGUI:
         
         # Bind mouse wheel
         canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+    
+    def create_lazy_layout(self, main_frame):
+        """Show empty tabs immediately and build each section when first selected"""
+        # Title
+        title_label = ttk.Label(main_frame, text="Navidrome Configuration", 
+                               font=("Arial", 16, "bold"))
+        title_label.pack(pady=(0, 10))
+        
+        # Buttons sit below the tabs so they are usable before any section exists
+        self.create_buttons(main_frame, side=tk.BOTTOM)
+        self.save_button.config(state=tk.DISABLED)
+        
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        
+        self._pending_sections = {}
+        for title, builder in self.section_builders():
+            tab = ttk.Frame(self.notebook, padding="10")
+            self.notebook.add(tab, text=title)
+            self._pending_sections[str(tab)] = builder
+        
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self._build_selected_section())
+        self.root.after_idle(self._build_selected_section)
+        
+        # Read and parse the TOML file off the Tk thread
+        config_file = self.config_file
+        self.run_in_background(lambda: load_config_file(config_file),
+                               self._on_background_load, self._on_background_load_error)
+    
+    def _build_selected_section(self):
+        """Build the widgets of the selected tab if that has not happened yet"""
+        tab = self.notebook.select()
+        builder = self._pending_sections.pop(tab, None)
+        if builder is not None:
+            builder(self.notebook.nametowidget(tab))
+    
+    def _on_background_load(self, config):
+        # The first tab can be edited before the file has been read; those
+        # edits win over the loaded values
+        local = self.dirty_values()
+        self.config = config
+        self.update_ui_from_config()
+        for key, value in local.items():
+            self.set_value(key, value)
+        self.save_button.config(state=tk.NORMAL)
+        self.watch_config_file()
+    
+    def _on_background_load_error(self, error):
+        messagebox.showerror("Error", f"Failed to load configuration: {str(error)}")
+        self.config = {}
+        self.save_button.config(state=tk.NORMAL)
+        self.watch_config_file()
+    
+    def create_buttons(self, parent, side=None):
+        """Create the Save/Load/Reset/View button row"""
+        button_frame = ttk.Frame(parent)
+        button_frame.pack(side=side, pady=20, fill=tk.X)
         
+        self.save_button = ttk.Button(button_frame, text="Save Configuration", 
+                                      command=self.save_config)
+        self.save_button.pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Load Configuration", 
+                  command=self.load_config_file).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Reset to Defaults", 
+                  command=self.reset_to_defaults).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="View Raw TOML", 
+                  command=self.view_raw_toml).pack(side=tk.LEFT)
+    
+    def run_in_background(self, work, on_done, on_error=None):
+        """Run ``work`` on a worker thread and hand its result to ``on_done`` on the Tk thread"""
+        def runner():
+            try:
+                result = work()
+            except Exception as e:
+                if on_error is not None:
+                    self.post_to_ui(on_error, e)
+            else:
+                self.post_to_ui(on_done, result)
+        
+        threading.Thread(target=runner, daemon=True).start()
+    
+    def post_to_ui(self, callback, *args):
+        """Queue ``callback(*args)`` to run on the Tk thread; safe to call from any thread"""
+        self._ui_queue.put((callback, args))
+    
+    def _poll_ui_queue(self):
+        while True:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        self.root.after(self.UI_POLL_MS, self._poll_ui_queue)
+    
+    def _record_first_paint(self):
+        self.first_paint_seconds = time.perf_counter() - self._start_time
+    
     def _on_mousewheel(self, event):
         canvas = event.widget.master.master
         canvas.yview_scroll(int(-1*(event.delta/120)), "units")
@@ -80,182 +243,141 @@ class NavidromeConfigGUI:
         section_frame.pack(fill=tk.X, pady=(0, 15))
         return section_frame
     
+    def create_fields_section(self, parent, section_id):
+        """Create a section frame with a widget for every schema field in it"""
+        title = next(title for sid, title, _ in SECTIONS if sid == section_id)
+        section = self.create_section_frame(parent, title)
+        for row, field in enumerate(section_fields(section_id)):
+            self.create_field_widget(section, row, field)
+        return section
+    
+    def create_field_widget(self, section, row, field):
+        """Create the Tk variable and widget for one schema field"""
+        value = display_value(field.key, self.config.get(field.key, field.default))
+        if field.widget == 'check':
+            var = tk.BooleanVar(value=value)
+            ttk.Checkbutton(section, text=field.label, variable=var).grid(row=row, column=0, 
+                                                                          columnspan=2, sticky=tk.W, pady=5)
+        else:
+            var = tk.StringVar(value=value)
+            ttk.Label(section, text=f"{field.label}:").grid(row=row, column=0, sticky=tk.W, pady=5)
+            if field.widget == 'combo':
+                ttk.Combobox(section, textvariable=var, values=field.choices, 
+                             state="readonly", width=field.width).grid(row=row, column=1, sticky=tk.W, 
+                                                                        padx=(10, 0), pady=5)
+            elif field.widget == 'entry':
+                ttk.Entry(section, textvariable=var, width=field.width).grid(row=row, column=1, 
+                                                                             sticky=tk.W, padx=(10, 0), pady=5)
+            else:
+                browse_frame = ttk.Frame(section)
+                browse_frame.grid(row=row, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+                ttk.Entry(browse_frame, textvariable=var, width=field.width).pack(side=tk.LEFT)
+                if field.widget == 'folder':
+                    command = lambda: self.browse_folder(var)
+                else:
+                    command = lambda: self.browse_file(var, field.browse)
+                ttk.Button(browse_frame, text="Browse", command=command).pack(side=tk.LEFT, padx=(5, 0))
+        
+        var.trace_add('write', lambda *args: self._on_field_changed(field.key))
+        self.vars[field.key] = var
+        
+        if field.key in CHECKS:
+            label = ttk.Label(section, wraplength=250)
+            label.grid(row=row, column=2, sticky=tk.W, padx=(10, 0), pady=5)
+            self._validation_labels[field.key] = label
+            self._schedule_validation(field.key)
+        return var
+    
+    def _on_field_changed(self, key):
+        if not self._syncing:
+            self._dirty.add(key)
+        self._schedule_validation(key)
+        if self.toml_editor is not None:
+            self.toml_editor.on_form_changed(key)
+    
+    def _schedule_validation(self, key):
+        """(Re)start the debounce timer for ``key`` and the checks that depend on it"""
+        for name in [key] + DEPENDENTS.get(key, []):
+            if name not in self._validation_labels:
+                continue
+            pending = self._validation_pending.pop(name, None)
+            if pending is not None:
+                self.root.after_cancel(pending)
+            self._validation_pending[name] = self.root.after(
+                self.VALIDATION_DEBOUNCE_MS, lambda name=name: self._validate(name))
+    
+    def _validation_inputs(self, key):
+        return ValidationEngine.inputs(key, lambda name: str(self.get_value(name)))
+    
+    def _validate(self, key):
+        self._validation_pending.pop(key, None)
+        self.validation.validate(key, self._validation_inputs(key))
+    
+    def _show_validation(self, key, inputs, status, message):
+        label = self._validation_labels.get(key)
+        # Drop results for values that were edited while the check ran
+        if label is None or not label.winfo_exists() or inputs != self._validation_inputs(key):
+            return
+        if status == OK:
+            label.config(text=f"\u2713 {message}".rstrip(), foreground="#2a7d2a")
+        elif status == ERROR:
+            label.config(text=f"\u2717 {message}", foreground="#c00000")
+        else:
+            label.config(text=f"\u26a0 {message}", foreground="#b06000")
+    
     def create_general_section(self, parent):
         """General configuration options"""
-        section = self.create_section_frame(parent, "General Settings")
-        
-        # Log Level
-        ttk.Label(section, text="Log Level:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        self.log_level_var = tk.StringVar(value=self.config.get('LogLevel', 'INFO'))
-        log_level_combo = ttk.Combobox(section, textvariable=self.log_level_var, 
-                                       values=['DEBUG', 'INFO', 'WARN', 'ERROR'], 
-                                       state="readonly", width=15)
-        log_level_combo.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Port
-        ttk.Label(section, text="Port:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.port_var = tk.StringVar(value=str(self.config.get('Port', 4533)))
-        ttk.Entry(section, textvariable=self.port_var, width=15).grid(row=1, column=1, 
-                                                                     sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Address
-        ttk.Label(section, text="Address:").grid(row=2, column=0, sticky=tk.W, pady=5)
-        self.address_var = tk.StringVar(value=self.config.get('Address', '0.0.0.0'))
-        ttk.Entry(section, textvariable=self.address_var, width=20).grid(row=2, column=1, 
-                                                                       sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Data Folder
-        ttk.Label(section, text="Data Folder:").grid(row=3, column=0, sticky=tk.W, pady=5)
-        data_frame = ttk.Frame(section)
-        data_frame.grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        self.data_folder_var = tk.StringVar(value=self.config.get('DataFolder', './data'))
-        ttk.Entry(data_frame, textvariable=self.data_folder_var, width=30).pack(side=tk.LEFT)
-        ttk.Button(data_frame, text="Browse", 
-                  command=lambda: self.browse_folder(self.data_folder_var)).pack(side=tk.LEFT, padx=(5, 0))
+        section = self.create_fields_section(parent, 'general')
+        ttk.Button(section, text="Monitor Server...", 
+                  command=self.monitor_server).grid(row=section.grid_size()[1], column=0, 
+                                                    columnspan=2, sticky=tk.W, pady=(10, 0))
+        return section
     
     def create_paths_section(self, parent):
         """Music and media paths"""
-        section = self.create_section_frame(parent, "Music & Media Paths")
-        
-        # Music Folder
-        ttk.Label(section, text="Music Folder:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        music_frame = ttk.Frame(section)
-        music_frame.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        self.music_folder_var = tk.StringVar(value=self.config.get('MusicFolder', ''))
-        ttk.Entry(music_frame, textvariable=self.music_folder_var, width=40).pack(side=tk.LEFT)
-        ttk.Button(music_frame, text="Browse", 
-                  command=lambda: self.browse_folder(self.music_folder_var)).pack(side=tk.LEFT, padx=(5, 0))
-        
-        # FFmpeg Path
-        ttk.Label(section, text="FFmpeg Path:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        ffmpeg_frame = ttk.Frame(section)
-        ffmpeg_frame.grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        self.ffmpeg_path_var = tk.StringVar(value=self.config.get('FFmpegPath', ''))
-        ttk.Entry(ffmpeg_frame, textvariable=self.ffmpeg_path_var, width=40).pack(side=tk.LEFT)
-        ttk.Button(ffmpeg_frame, text="Browse", 
-                  command=lambda: self.browse_file(self.ffmpeg_path_var, [("Executable", "*.exe"), ("All files", "*.*")])).pack(side=tk.LEFT, padx=(5, 0))
+        section = self.create_fields_section(parent, 'paths')
+        ttk.Button(section, text="Benchmark FFmpeg...", 
+                  command=self.benchmark_ffmpeg).grid(row=section.grid_size()[1], column=0, 
+                                                      columnspan=2, sticky=tk.W, pady=(10, 0))
+        return section
     
     def create_scanning_section(self, parent):
         """Library scanning options"""
-        section = self.create_section_frame(parent, "Library Scanning")
-        
-        # Scan Schedule
-        ttk.Label(section, text="Scan Schedule:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        self.scan_schedule_var = tk.StringVar(value=self.config.get('ScanSchedule', '@every 24h'))
-        scan_combo = ttk.Combobox(section, textvariable=self.scan_schedule_var, 
-                                  values=['@every 1h', '@every 6h', '@every 12h', '@every 24h', 
-                                         '@every 48h', '@weekly', '@monthly', 'manual'], 
-                                  state="readonly", width=20)
-        scan_combo.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Auto Scan
-        self.auto_scan_var = tk.BooleanVar(value=self.config.get('AutoScan', True))
-        ttk.Checkbutton(section, text="Auto Scan", variable=self.auto_scan_var).grid(row=1, column=0, 
-                                                                                   columnspan=2, sticky=tk.W, pady=5)
-        
-        # Scan at Startup
-        self.scan_at_startup_var = tk.BooleanVar(value=self.config.get('ScanAtStartup', True))
-        ttk.Checkbutton(section, text="Scan at Startup", variable=self.scan_at_startup_var).grid(row=2, column=0, 
-                                                                                               columnspan=2, sticky=tk.W, pady=5)
+        section = self.create_fields_section(parent, 'scanning')
+        ttk.Button(section, text="Analyze Library...", 
+                  command=self.analyze_library).grid(row=section.grid_size()[1], column=0, 
+                                                     columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Button(section, text="Library Changes...", 
+                  command=self.library_changes).grid(row=section.grid_size()[1], column=0, 
+                                                     columnspan=2, sticky=tk.W, pady=(5, 0))
+        return section
     
     def create_transcoding_section(self, parent):
         """Audio transcoding options"""
-        section = self.create_section_frame(parent, "Audio Transcoding")
-        
-        # Transcoding Cache Size
-        ttk.Label(section, text="Cache Size:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        self.cache_size_var = tk.StringVar(value=self.config.get('TranscodingCacheSize', '150MiB'))
-        cache_combo = ttk.Combobox(section, textvariable=self.cache_size_var, 
-                                   values=['50MiB', '100MiB', '150MiB', '200MiB', '500MiB', '1GiB'], 
-                                   state="readonly", width=15)
-        cache_combo.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Enable Transcoding
-        self.enable_transcoding_var = tk.BooleanVar(value=self.config.get('EnableTranscoding', True))
-        ttk.Checkbutton(section, text="Enable Transcoding", variable=self.enable_transcoding_var).grid(row=1, column=0, 
-                                                                                                     columnspan=2, sticky=tk.W, pady=5)
-        
-        # Transcoding Format
-        ttk.Label(section, text="Default Format:").grid(row=2, column=0, sticky=tk.W, pady=5)
-        self.transcode_format_var = tk.StringVar(value=self.config.get('TranscodingFormat', 'mp3'))
-        format_combo = ttk.Combobox(section, textvariable=self.transcode_format_var, 
-                                    values=['mp3', 'aac', 'ogg', 'opus'], 
-                                    state="readonly", width=15)
-        format_combo.grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        section = self.create_fields_section(parent, 'transcoding')
+        ttk.Button(section, text="Simulate Cache Size...", 
+                  command=self.simulate_cache).grid(row=section.grid_size()[1], column=0, 
+                                                    columnspan=2, sticky=tk.W, pady=(10, 0))
+        return section
     
     def create_web_interface_section(self, parent):
         """Web interface options"""
-        section = self.create_section_frame(parent, "Web Interface")
-        
-        # Enable Web Interface
-        self.enable_web_var = tk.BooleanVar(value=self.config.get('EnableWebInterface', True))
-        ttk.Checkbutton(section, text="Enable Web Interface", variable=self.enable_web_var).grid(row=0, column=0, 
-                                                                                               columnspan=2, sticky=tk.W, pady=5)
-        
-        # Theme
-        ttk.Label(section, text="Theme:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.theme_var = tk.StringVar(value=self.config.get('Theme', 'default'))
-        theme_combo = ttk.Combobox(section, textvariable=self.theme_var, 
-                                   values=['default', 'dark', 'light'], 
-                                   state="readonly", width=15)
-        theme_combo.grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Enable Downloads
-        self.enable_downloads_var = tk.BooleanVar(value=self.config.get('EnableDownloads', True))
-        ttk.Checkbutton(section, text="Enable Downloads", variable=self.enable_downloads_var).grid(row=2, column=0, 
-                                                                                                 columnspan=2, sticky=tk.W, pady=5)
+        return self.create_fields_section(parent, 'web')
     
     def create_security_section(self, parent):
         """Security and authentication options"""
-        section = self.create_section_frame(parent, "Security & Authentication")
-        
-        # Enable Authentication
-        self.enable_auth_var = tk.BooleanVar(value=self.config.get('EnableAuthentication', True))
-        ttk.Checkbutton(section, text="Enable Authentication", variable=self.enable_auth_var).grid(row=0, column=0, 
-                                                                                                 columnspan=2, sticky=tk.W, pady=5)
-        
-        # Session Timeout
-        ttk.Label(section, text="Session Timeout (hours):").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.session_timeout_var = tk.StringVar(value=str(self.config.get('SessionTimeout', 24)))
-        ttk.Entry(section, textvariable=self.session_timeout_var, width=15).grid(row=1, column=1, 
-                                                                               sticky=tk.W, padx=(10, 0), pady=5)
-        
-        # Enable Registration
-        self.enable_registration_var = tk.BooleanVar(value=self.config.get('EnableRegistration', False))
-        ttk.Checkbutton(section, text="Enable User Registration", variable=self.enable_registration_var).grid(row=2, column=0, 
-                                                                                                            columnspan=2, sticky=tk.W, pady=5)
+        return self.create_fields_section(parent, 'security')
     
     def create_advanced_section(self, parent):
         """Advanced configuration options"""
-        section = self.create_section_frame(parent, "Advanced Options")
-        
-        # Database Path
-        ttk.Label(section, text="Database Path:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        db_frame = ttk.Frame(section)
-        db_frame.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        self.db_path_var = tk.StringVar(value=self.config.get('DbPath', './navidrome.db'))
-        ttk.Entry(db_frame, textvariable=self.db_path_var, width=30).pack(side=tk.LEFT)
-        ttk.Button(db_frame, text="Browse", 
-                  command=lambda: self.browse_file(self.db_path_var, [("Database files", "*.db"), ("All files", "*.*")])).pack(side=tk.LEFT, padx=(5, 0))
-        
-        # Log File
-        ttk.Label(section, text="Log File:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        log_frame = ttk.Frame(section)
-        log_frame.grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
-        
-        self.log_file_var = tk.StringVar(value=self.config.get('LogFile', ''))
-        ttk.Entry(log_frame, textvariable=self.log_file_var, width=30).pack(side=tk.LEFT)
-        ttk.Button(log_frame, text="Browse", 
-                  command=lambda: self.browse_file(self.log_file_var, [("Log files", "*.log"), ("All files", "*.*")])).pack(side=tk.LEFT, padx=(5, 0))
-        
-        # Verbose Logging
-        self.verbose_logging_var = tk.BooleanVar(value=self.config.get('VerboseLogging', False))
-        ttk.Checkbutton(section, text="Verbose Logging", variable=self.verbose_logging_var).grid(row=2, column=0, 
-                                                                                                columnspan=2, sticky=tk.W, pady=5)
+        section = self.create_fields_section(parent, 'advanced')
+        ttk.Button(section, text="Analyze Database...", 
+                  command=self.analyze_database).grid(row=section.grid_size()[1], column=0, 
+                                                      columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Button(section, text="View Log...", 
+                  command=self.view_log).grid(row=section.grid_size()[1], column=0, 
+                                              columnspan=2, sticky=tk.W, pady=(5, 0))
+        return section
     
     def browse_folder(self, string_var):
         """Browse for a folder"""
@@ -269,17 +391,73 @@ class NavidromeConfigGUI:
         if file_path:
             string_var.set(file_path)
     
+    def close(self):
+        """Stop background work and destroy the main window"""
+        # Queued checks are dropped so a pending ffmpeg probe or a slow
+        # mount doesn't hold up the process exiting
+        self.validation.shutdown()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.root.destroy()
+    
     def load_config(self):
         """Load configuration from file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.config = toml.load(f)
-            else:
-                self.config = {}
+            self.config = load_config_file(self.config_file)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
             self.config = {}
+        self.watch_config_file()
+    
+    def watch_config_file(self):
+        """Start watching the open config file for changes made by other programs"""
+        path = os.path.abspath(self.config_file)
+        if self.watcher is not None:
+            if self.watcher.path == path:
+                # Same file reloaded: what is on disk now is what we have
+                self.watcher.acknowledge()
+                return
+            self.watcher.stop()
+        self.watcher = FileWatcher(path, self._on_config_file_changed)
+        self.watcher.start()
+    
+    def _on_config_file_changed(self, path):
+        # Runs on the watcher thread, so parsing never blocks the UI
+        try:
+            config = load_config_file(path)
+        except Exception as e:
+            self.post_to_ui(self.status_var.set, 
+                            f"{os.path.basename(path)} changed on disk but could not be parsed: {e}")
+            return
+        self.post_to_ui(self.merge_external_config, config)
+    
+    def merge_external_config(self, config):
+        """Bring changes made to the file by another program into the form
+        
+        Unsaved local edits are kept; if the other program changed the same
+        options, the user is warned that saving will overwrite its values.
+        """
+        if config == self.config:
+            return
+        local = self.dirty_values()
+        changed = {key for key in FIELDS_BY_KEY if config.get(key) != self.config.get(key)}
+        conflicts = sorted(key for key in local if key in changed)
+        
+        self.config = config
+        self.update_ui_from_config()
+        for key, value in local.items():
+            self.set_value(key, value)
+        
+        name = os.path.basename(self.config_file)
+        if conflicts:
+            self.status_var.set(f"{name} changed on disk; kept your unsaved edits to {', '.join(conflicts)}")
+            messagebox.showwarning("Configuration Changed", 
+                                   f"{name} was changed by another program.\n\n"
+                                   f"Your unsaved edits to {', '.join(conflicts)} were kept; "
+                                   f"saving will overwrite the new values on disk for these options.")
+        else:
+            self.status_var.set(f"Reloaded changes made to {name} by another program "
+                                f"at {time.strftime('%H:%M:%S')}")
     
     def load_config_file(self):
         """Load configuration from a selected file"""
@@ -288,106 +466,98 @@ class NavidromeConfigGUI:
             filetypes=[("TOML files", "*.toml"), ("All files", "*.*")]
         )
         if file_path:
+            if self.toml_editor is not None:
+                # The editor shows the file being replaced
+                self.toml_editor.close()
             self.config_file = file_path
             self.load_config()
             self.update_ui_from_config()
             messagebox.showinfo("Success", f"Configuration loaded from {file_path}")
     
     def update_ui_from_config(self):
-        """Update UI elements with loaded configuration"""
-        # Update all variables with loaded config
-        if hasattr(self, 'log_level_var'):
-            self.log_level_var.set(self.config.get('LogLevel', 'INFO'))
-        if hasattr(self, 'port_var'):
-            self.port_var.set(str(self.config.get('Port', 4533)))
-        if hasattr(self, 'address_var'):
-            self.address_var.set(self.config.get('Address', '0.0.0.0'))
-        if hasattr(self, 'data_folder_var'):
-            self.data_folder_var.set(self.config.get('DataFolder', './data'))
-        if hasattr(self, 'music_folder_var'):
-            self.music_folder_var.set(self.config.get('MusicFolder', ''))
-        if hasattr(self, 'ffmpeg_path_var'):
-            self.ffmpeg_path_var.set(self.config.get('FFmpegPath', ''))
-        if hasattr(self, 'scan_schedule_var'):
-            self.scan_schedule_var.set(self.config.get('ScanSchedule', '@every 24h'))
-        if hasattr(self, 'auto_scan_var'):
-            self.auto_scan_var.set(self.config.get('AutoScan', True))
-        if hasattr(self, 'scan_at_startup_var'):
-            self.scan_at_startup_var.set(self.config.get('ScanAtStartup', True))
-        if hasattr(self, 'cache_size_var'):
-            self.cache_size_var.set(self.config.get('TranscodingCacheSize', '150MiB'))
-        if hasattr(self, 'enable_transcoding_var'):
-            self.enable_transcoding_var.set(self.config.get('EnableTranscoding', True))
-        if hasattr(self, 'transcode_format_var'):
-            self.transcode_format_var.set(self.config.get('TranscodingFormat', 'mp3'))
-        if hasattr(self, 'enable_web_var'):
-            self.enable_web_var.set(self.config.get('EnableWebInterface', True))
-        if hasattr(self, 'theme_var'):
-            self.theme_var.set(self.config.get('Theme', 'default'))
-        if hasattr(self, 'enable_downloads_var'):
-            self.enable_downloads_var.set(self.config.get('EnableDownloads', True))
-        if hasattr(self, 'enable_auth_var'):
-            self.enable_auth_var.set(self.config.get('EnableAuthentication', True))
-        if hasattr(self, 'session_timeout_var'):
-            self.session_timeout_var.set(str(self.config.get('SessionTimeout', 24)))
-        if hasattr(self, 'enable_registration_var'):
-            self.enable_registration_var.set(self.config.get('EnableRegistration', False))
-        if hasattr(self, 'db_path_var'):
-            self.db_path_var.set(self.config.get('DbPath', './navidrome.db'))
-        if hasattr(self, 'log_file_var'):
-            self.log_file_var.set(self.config.get('LogFile', ''))
-        if hasattr(self, 'verbose_logging_var'):
-            self.verbose_logging_var.set(self.config.get('VerboseLogging', False))
+        """Update UI elements with loaded configuration
+        
+        Only options whose value differs from the last synced config, plus
+        any the user has edited since, are touched; everything else keeps
+        its variable (and its traces) untouched.
+        """
+        old, new = self._synced_config, self.config
+        keys = {key for key in FIELDS_BY_KEY if old.get(key) != new.get(key)}
+        keys |= self._dirty
+        
+        self._syncing = True
+        try:
+            for key in keys:
+                var = self.vars.get(key)
+                if var is None:
+                    continue
+                value = display_value(key, new.get(key, DEFAULTS[key]))
+                if var.get() != value:
+                    var.set(value)
+        finally:
+            self._syncing = False
+        
+        self._synced_config = new
+        self._dirty.clear()
+    
+    def get_value(self, key):
+        """Current value of an option, whether or not its section has been built"""
+        var = self.vars.get(key)
+        if var is not None:
+            return var.get()
+        return self.config.get(key, DEFAULTS[key])
+    
+    def set_value(self, key, value):
+        """Set an option from code (e.g. a recommendation) and mark it edited"""
+        var = self.vars.get(key)
+        if var is not None:
+            var.set(display_value(key, value))
+        else:
+            self.config = dict(self.config, **{key: value})
+            self._synced_config = self.config
+            self._dirty.add(key)
+            self._schedule_validation(key)
+            if self.toml_editor is not None:
+                self.toml_editor.on_form_changed(key)
+    
+    def dirty_values(self):
+        """Raw values of the options edited since the last load or save"""
+        return {key: self.get_value(key) for key in self._dirty}
+    
+    def pending_config(self):
+        """The configuration a save would write"""
+        if os.path.exists(self.config_file):
+            # Only the edited options are written over the loaded file
+            return merge_config(self.config, self.dirty_values())
+        # A new file gets every option; sections not built yet (lazy
+        # mode) use their loaded or default values
+        values = {key: var.get() for key, var in self.vars.items()}
+        return merge_config(build_config(self.config), values)
     
     def save_config(self):
         """Save configuration to file"""
+        if self.toml_editor is not None:
+            # The editor's text already holds the form's edits, plus its own
+            self.toml_editor.save()
+            return
         try:
-            # Build configuration dictionary from UI variables
-            config = {}
-            
-            # General settings
-            config['LogLevel'] = self.log_level_var.get()
-            config['Port'] = int(self.port_var.get())
-            config['Address'] = self.address_var.get()
-            config['DataFolder'] = self.data_folder_var.get()
-            
-            # Paths
-            if self.music_folder_var.get():
-                config['MusicFolder'] = self.music_folder_var.get()
-            if self.ffmpeg_path_var.get():
-                config['FFmpegPath'] = self.ffmpeg_path_var.get()
-            
-            # Scanning
-            config['ScanSchedule'] = self.scan_schedule_var.get()
-            config['AutoScan'] = self.auto_scan_var.get()
-            config['ScanAtStartup'] = self.scan_at_startup_var.get()
-            
-            # Transcoding
-            config['TranscodingCacheSize'] = self.cache_size_var.get()
-            config['EnableTranscoding'] = self.enable_transcoding_var.get()
-            config['TranscodingFormat'] = self.transcode_format_var.get()
-            
-            # Web interface
-            config['EnableWebInterface'] = self.enable_web_var.get()
-            config['Theme'] = self.theme_var.get()
-            config['EnableDownloads'] = self.enable_downloads_var.get()
+            config = self.pending_config()
+            # Options loaded from an existing file are only checked once edited
+            validate_config(config, self._dirty if os.path.exists(self.config_file) else None)
             
-            # Security
-            config['EnableAuthentication'] = self.enable_auth_var.get()
-            config['SessionTimeout'] = int(self.session_timeout_var.get())
-            config['EnableRegistration'] = self.enable_registration_var.get()
+            # Save to file; only changed keys are patched, and nothing is
+            # written if the content would be identical
+            written = write_config_file(self.config_file, config)
+            if self.watcher is not None:
+                self.watcher.acknowledge()
             
-            # Advanced
-            config['DbPath'] = self.db_path_var.get()
-            if self.log_file_var.get():
-                config['LogFile'] = self.log_file_var.get()
-            config['VerboseLogging'] = self.verbose_logging_var.get()
+            self.config = self._synced_config = config
+            self._dirty.clear()
             
-            # Save to file
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                toml.dump(config, f)
-            
-            messagebox.showinfo("Success", f"Configuration saved to {self.config_file}")
+            if written:
+                messagebox.showinfo("Success", f"Configuration saved to {self.config_file}")
+            else:
+                messagebox.showinfo("No Changes", f"{self.config_file} is already up to date")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
@@ -396,43 +566,1103 @@ class NavidromeConfigGUI:
         """Reset configuration to default values"""
         if messagebox.askyesno("Reset Configuration", 
                               "Are you sure you want to reset all settings to defaults?"):
-            self.config = {}
+            # Options the GUI does not manage are left alone
+            unknown = {key: value for key, value in self.config.items() if key not in FIELDS_BY_KEY}
+            self.config = {**build_config({}), **unknown}
             self.update_ui_from_config()
             messagebox.showinfo("Success", "Configuration reset to defaults")
     
+    def analyze_library(self):
+        """Open the MusicFolder analyzer window"""
+        music_folder = self.get_value('MusicFolder')
+        if not music_folder:
+            messagebox.showerror("Error", "Set the Music Folder before analyzing the library")
+            return
+        LibraryAnalyzerWindow(self, music_folder)
+    
+    def library_changes(self):
+        """Open the window comparing the MusicFolder with its last snapshot"""
+        music_folder = self.get_value('MusicFolder')
+        if not music_folder:
+            messagebox.showerror("Error", "Set the Music Folder before checking for library changes")
+            return
+        LibraryChangesWindow(self, music_folder, self.get_value('DataFolder') or '.')
+    
+    def simulate_cache(self):
+        """Pick a play history and open the transcoding cache simulator"""
+        log_file = self.get_value('LogFile')
+        history_file = filedialog.askopenfilename(
+            title="Select Navidrome Log or Play History CSV",
+            initialfile=os.path.basename(log_file) if log_file else None,
+            initialdir=os.path.dirname(log_file) if log_file else None,
+            filetypes=[("Log files", "*.log"), ("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if history_file:
+            CacheSimulatorWindow(self, history_file, self.get_value('TranscodingFormat'))
+    
+    def benchmark_ffmpeg(self):
+        """Open the FFmpeg transcoding benchmark window"""
+        FFmpegBenchmarkWindow(self, self.get_value('FFmpegPath') or 'ffmpeg', 
+                              self.get_value('MusicFolder'))
+    
+    def analyze_database(self):
+        """Open the read-only database analyzer window"""
+        db_path = self.get_value('DbPath')
+        if not db_path or not os.path.isfile(db_path):
+            messagebox.showerror("Error", f"Database file not found: {db_path or '(not set)'}")
+            return
+        DatabaseAnalyzerWindow(self, db_path)
+    
+    def view_log(self):
+        """Open the log viewer for LogFile"""
+        log_file = self.get_value('LogFile')
+        if not log_file or not os.path.isfile(log_file):
+            messagebox.showerror("Error", f"Log file not found: {log_file or '(not set)'}")
+            return
+        LogViewerWindow(self, log_file)
+    
+    def monitor_server(self):
+        """Open the live latency monitor for the configured Address and Port"""
+        ServerMonitorWindow(self, self.get_value('Address'), self.get_value('Port'))
+    
     def view_raw_toml(self):
-        """View the raw TOML configuration"""
+        """Open the raw TOML editor, or bring it to the front"""
+        if self.toml_editor is not None:
+            self.toml_editor.window.lift()
+            return
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            else:
-                content = "# No configuration file found"
-            
-            # Create new window to display TOML
-            toml_window = tk.Toplevel(self.root)
-            toml_window.title("Raw TOML Configuration")
-            toml_window.geometry("600x500")
-            
-            text_widget = scrolledtext.ScrolledText(toml_window, wrap=tk.WORD)
-            text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            text_widget.insert(tk.END, content)
-            text_widget.config(state=tk.DISABLED)
-            
+            # The file as a save would write it, so unsaved form edits show
+            # up in the text; the file itself is served from the shared
+            # document cache unless it changed
+            content = render_config(self.config_file, self.pending_config())[1].replace('\r\n', '\n')
+            if not content.endswith('\n'):
+                content += '\n'
+            self.toml_editor = TomlEditorWindow(self, content)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to read TOML file: {str(e)}")
 
+class LibraryAnalyzerWindow:
+    """Window showing live MusicFolder totals and a scan-time estimate"""
+    
+    def __init__(self, app, music_folder):
+        self.app = app
+        self.estimate = None
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Library Analysis")
+        self.window.geometry("520x480")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=music_folder, font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=(0, 10))
+        
+        self.totals_var = tk.StringVar(value="Starting...")
+        ttk.Label(frame, textvariable=self.totals_var, justify=tk.LEFT).pack(anchor=tk.W)
+        
+        # Per-extension breakdown
+        columns = ("count", "size")
+        self.tree = ttk.Treeview(frame, columns=columns, height=8)
+        self.tree.heading("#0", text="Extension")
+        self.tree.heading("count", text="Files")
+        self.tree.heading("size", text="Size")
+        self.tree.column("#0", width=120)
+        self.tree.column("count", width=120, anchor=tk.E)
+        self.tree.column("size", width=120, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.estimate_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.estimate_var, justify=tk.LEFT, 
+                  wraplength=480).pack(anchor=tk.W)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        self.apply_button = ttk.Button(button_frame, text="Apply Recommendation", 
+                                       command=self.apply_recommendation, state=tk.DISABLED)
+        self.apply_button.pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(button_frame, text="Close", command=self.close).pack(side=tk.RIGHT)
+        
+        # Totals stream in from the walker thread through the app's UI queue
+        self.analyzer = LibraryAnalyzer(music_folder, 
+                                        progress=lambda stats: app.post_to_ui(self.show_stats, stats))
+        app.run_in_background(self.analyzer.run, self.on_finished, self.on_error)
+    
+    def show_stats(self, stats):
+        if not self.window.winfo_exists():
+            return
+        rate = stats.files / stats.elapsed if stats.elapsed else 0
+        self.totals_var.set(f"Files: {stats.files:,} ({stats.audio_files:,} audio)\n"
+                            f"Folders: {stats.directories:,}\n"
+                            f"Size: {format_size(stats.bytes)}\n"
+                            f"Elapsed: {format_duration(stats.elapsed)} ({rate:,.0f} files/s)"
+                            + (f"\nUnreadable entries: {stats.errors:,}" if stats.errors else ""))
+        self.tree.delete(*self.tree.get_children())
+        for ext, count, size in stats.top_extensions():
+            self.tree.insert("", tk.END, text=ext or "(none)", values=(f"{count:,}", format_size(size)))
+    
+    def on_finished(self, stats):
+        if not self.window.winfo_exists():
+            return
+        self.show_stats(stats)
+        self.cancel_button.config(state=tk.DISABLED)
+        if stats.cancelled:
+            self.estimate_var.set("Analysis cancelled; totals above are partial.")
+            return
+        self.estimate = estimate_scan(stats)
+        self.estimate_var.set(
+            f"Estimated first full scan: {format_duration(self.estimate['full_scan_seconds'])}\n"
+            f"Estimated incremental scan: {format_duration(self.estimate['incremental_scan_seconds'])}\n"
+            f"Recommended: ScanSchedule = {self.estimate['ScanSchedule']}, "
+            f"ScanAtStartup = {str(self.estimate['ScanAtStartup']).lower()} "
+            f"({self.estimate['reason']})")
+        self.apply_button.config(state=tk.NORMAL)
+    
+    def on_error(self, error):
+        if self.window.winfo_exists():
+            self.cancel_button.config(state=tk.DISABLED)
+            self.estimate_var.set(f"Analysis failed: {error}")
+    
+    def apply_recommendation(self):
+        self.app.set_value('ScanSchedule', self.estimate['ScanSchedule'])
+        self.app.set_value('ScanAtStartup', self.estimate['ScanAtStartup'])
+        self.window.destroy()
+    
+    def cancel(self):
+        self.analyzer.cancel()
+    
+    def close(self):
+        self.analyzer.cancel()
+        self.window.destroy()
+
+class LibraryChangesWindow:
+    """Window reporting files added, removed and modified since the last snapshot"""
+    
+    def __init__(self, app, music_folder, data_folder):
+        self.app = app
+        self.music_folder = music_folder
+        self.data_folder = data_folder
+        self.scanner = None
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Library Changes")
+        self.window.geometry("560x440")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=music_folder, font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=(0, 10))
+        
+        self.status_var = tk.StringVar(value="Press Check to compare the library with its last snapshot.")
+        ttk.Label(frame, textvariable=self.status_var, justify=tk.LEFT, 
+                  wraplength=520).pack(anchor=tk.W)
+        
+        # Churn history, one row per pass
+        columns = ("files", "added", "removed", "modified", "seconds")
+        self.tree = ttk.Treeview(frame, columns=columns, height=8)
+        self.tree.heading("#0", text="Checked")
+        self.tree.column("#0", width=140)
+        for column in columns:
+            self.tree.heading(column, text=column.capitalize())
+            self.tree.column(column, width=75, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.deep_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Check every file (finds in-place tag edits, slower)", 
+                        variable=self.deep_var).pack(anchor=tk.W)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        self.start_button = ttk.Button(button_frame, text="Check", command=self.start)
+        self.start_button.pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel, 
+                                        state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(button_frame, text="Close", command=self.close).pack(side=tk.RIGHT)
+        
+        self.show_history()
+    
+    def show_history(self):
+        self.tree.delete(*self.tree.get_children())
+        for row in reversed(load_churn_history(self.data_folder)):
+            self.tree.insert("", tk.END, text=row['timestamp'].replace('T', ' '), 
+                             values=(f"{int(row['files']):,}", row['added'], row['removed'], 
+                                     row['modified'], row['seconds']))
+    
+    def start(self):
+        self.start_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.scanner = SnapshotScanner(self.music_folder, self.data_folder, deep=self.deep_var.get(), 
+                                       progress=lambda report: self.app.post_to_ui(self.show_progress, 
+                                                                                   report.directories, 
+                                                                                   report.files))
+        self.app.run_in_background(self.scanner.run, self.on_finished, self.on_error)
+    
+    def show_progress(self, directories, files):
+        if self.window.winfo_exists():
+            self.status_var.set(f"Checked {directories:,} folders, {files:,} files...")
+    
+    def on_finished(self, report):
+        if not self.window.winfo_exists():
+            return
+        self.start_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        if report.cancelled:
+            self.status_var.set("Check cancelled; the previous snapshot was kept.")
+            return
+        summary = (f"{report.files:,} files in {report.directories:,} folders checked in "
+                   f"{format_duration(report.seconds)} ({report.reused_directories:,} folders unchanged).")
+        if report.previous_created is None:
+            summary += "\nFirst snapshot saved; check again later to see what changed."
+        else:
+            summary += (f"\nSince the last check: {report.added:,} added, {report.removed:,} removed, "
+                        f"{report.modified:,} modified.")
+            rate = report.changes_per_day()
+            if rate is not None:
+                summary += f" That is about {rate:,.0f} changed files per day."
+        self.status_var.set(summary)
+        self.show_history()
+    
+    def on_error(self, error):
+        if self.window.winfo_exists():
+            self.start_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set(f"Check failed: {error}")
+    
+    def cancel(self):
+        if self.scanner is not None:
+            self.scanner.cancel()
+    
+    def close(self):
+        self.cancel()
+        self.window.destroy()
+
+class CacheSimulatorWindow:
+    """Window showing simulated transcoding cache hit rates per cache size"""
+    
+    def __init__(self, app, history_file, transcoding_format):
+        self.app = app
+        self.recommended = None
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Transcoding Cache Simulation")
+        self.window.geometry("560x360")
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.status_var = tk.StringVar(value=f"Replaying {os.path.basename(history_file)} "
+                                             f"as {transcoding_format}...")
+        ttk.Label(frame, textvariable=self.status_var, wraplength=520, 
+                  justify=tk.LEFT).pack(anchor=tk.W)
+        
+        columns = ("hit_rate", "transcoded", "retranscoded")
+        self.tree = ttk.Treeview(frame, columns=columns, height=8)
+        self.tree.heading("#0", text="Cache Size")
+        self.tree.heading("hit_rate", text="Hit Rate")
+        self.tree.heading("transcoded", text="Transcoded")
+        self.tree.heading("retranscoded", text="Re-transcoded")
+        for column in ("#0",) + columns:
+            self.tree.column(column, width=120, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X)
+        self.apply_button = ttk.Button(button_frame, text="Use Recommended Size", 
+                                       command=self.apply_recommendation, state=tk.DISABLED)
+        self.apply_button.pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Close", command=self.window.destroy).pack(side=tk.RIGHT)
+        
+        def work():
+            start = time.perf_counter()
+            history = load_history(history_file)
+            results = simulate(history, CHOICES['TranscodingCacheSize'], transcoding_format)
+            return history, results, time.perf_counter() - start
+        
+        app.run_in_background(work, self.show_results, self.on_error)
+    
+    def show_results(self, outcome):
+        if not self.window.winfo_exists():
+            return
+        history, results, seconds = outcome
+        if not len(history):
+            self.status_var.set("No stream events found in this file.")
+            return
+        self.recommended = recommend_size(results)
+        self.status_var.set(f"{len(history):,} plays of {history.track_count:,} tracks "
+                            f"simulated in {seconds:.1f} s. Recommended: {self.recommended}")
+        for result in results:
+            self.tree.insert("", tk.END, text=result['cache_size'], 
+                             values=(f"{result['hit_rate']:.1%}", 
+                                     format_size(result['transcoded_bytes']), 
+                                     format_size(result['retranscoded_bytes'])))
+        self.apply_button.config(state=tk.NORMAL)
+    
+    def on_error(self, error):
+        if self.window.winfo_exists():
+            self.status_var.set(f"Simulation failed: {error}")
+    
+    def apply_recommendation(self):
+        self.app.set_value('TranscodingCacheSize', self.recommended)
+        self.window.destroy()
+
+class FFmpegBenchmarkWindow:
+    """Window running the FFmpeg throughput benchmark for each transcoding format"""
+    
+    def __init__(self, app, ffmpeg_path, music_folder):
+        self.app = app
+        self.ffmpeg_path = ffmpeg_path
+        self.music_folder = music_folder
+        self.benchmark = None
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("FFmpeg Transcoding Benchmark")
+        self.window.geometry("580x400")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=f"FFmpeg: {ffmpeg_path}").pack(anchor=tk.W)
+        
+        # Audio source
+        self.source_var = tk.StringVar(value='library' if music_folder else 'tones')
+        ttk.Radiobutton(frame, text="Sample tracks from the Music Folder", value='library', 
+                        variable=self.source_var, 
+                        state=tk.NORMAL if music_folder else tk.DISABLED).pack(anchor=tk.W, pady=(5, 0))
+        ttk.Radiobutton(frame, text="Generated test tones", value='tones', 
+                        variable=self.source_var).pack(anchor=tk.W)
+        
+        self.status_var = tk.StringVar(value="Press Start to begin; this runs ffmpeg many times.")
+        ttk.Label(frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(10, 0))
+        
+        columns = ("realtime", "cpu", "streams")
+        self.tree = ttk.Treeview(frame, columns=columns, height=5, selectmode="browse")
+        self.tree.heading("#0", text="Format")
+        self.tree.heading("realtime", text="Realtime Factor")
+        self.tree.heading("cpu", text="CPU s / Track Minute")
+        self.tree.heading("streams", text="Max Concurrent Streams")
+        self.tree.column("#0", width=80)
+        for column in columns:
+            self.tree.column(column, width=150, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X)
+        self.start_button = ttk.Button(button_frame, text="Start", command=self.start)
+        self.start_button.pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel, 
+                                        state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(button_frame, text="Use Selected Format", 
+                  command=self.apply_format).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(button_frame, text="Close", command=self.close).pack(side=tk.RIGHT)
+    
+    def start(self):
+        self.tree.delete(*self.tree.get_children())
+        self.start_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        use_library = self.source_var.get() == 'library'
+        self.benchmark = FFmpegBenchmark(self.ffmpeg_path, 
+                                         progress=lambda message: self.app.post_to_ui(self.status_var.set, message))
+        
+        def work():
+            if use_library:
+                self.app.post_to_ui(self.status_var.set, "Picking sample tracks...")
+                self.benchmark.samples = find_sample_tracks(self.music_folder)
+            return self.benchmark.run()
+        
+        self.app.run_in_background(work, self.show_results, self.on_error)
+    
+    def show_results(self, results):
+        if not self.window.winfo_exists():
+            return
+        for result in results:
+            if result['error']:
+                values = ("error", "", result['error'])
+            elif result['levels']:
+                values = (f"{result['realtime_factor']:.1f}x", 
+                          f"{result['cpu_seconds_per_minute']:.2f}", 
+                          format_streams(result))
+            else:
+                continue
+            self.tree.insert("", tk.END, iid=result['format'], text=result['format'], values=values)
+        self.status_var.set("Benchmark cancelled." if self.benchmark.cancelled else "Benchmark finished.")
+        self.start_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+    
+    def on_error(self, error):
+        if self.window.winfo_exists():
+            self.status_var.set(f"Benchmark failed: {error}")
+            self.start_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+    
+    def apply_format(self):
+        selection = self.tree.selection()
+        if selection:
+            self.app.set_value('TranscodingFormat', selection[0])
+    
+    def cancel(self):
+        if self.benchmark is not None:
+            self.benchmark.cancel()
+    
+    def close(self):
+        self.cancel()
+        self.window.destroy()
+
+class DatabaseAnalyzerWindow:
+    """Window streaming database layout, sizes, query timings and recommendations"""
+    
+    def __init__(self, app, db_path):
+        self.app = app
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Database Analysis")
+        self.window.geometry("620x520")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=db_path, font=("Arial", 10, "bold")).pack(anchor=tk.W)
+        self.status_var = tk.StringVar(value="Analyzing (read-only)...")
+        ttk.Label(frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(5, 0))
+        
+        self.tree = ttk.Treeview(frame, columns=("value",), height=14)
+        self.tree.heading("#0", text="Item")
+        self.tree.heading("value", text="Value")
+        self.tree.column("#0", width=300)
+        self.tree.column("value", width=260)
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        for iid, text in (('layout', "Database"), ('tables', "Tables (rows)"), 
+                          ('indexes', "Indexes (size)"), ('queries', "Queries")):
+            self.tree.insert("", tk.END, iid=iid, text=text, open=True)
+        
+        self.recommendations = tk.Text(frame, height=5, wrap=tk.WORD, relief=tk.FLAT, 
+                                       background=frame.winfo_toplevel().cget('background'))
+        self.recommendations.pack(fill=tk.X)
+        self.recommendations.config(state=tk.DISABLED)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Close", command=self.close).pack(side=tk.RIGHT)
+        
+        # Each result is posted to the UI queue as soon as the worker has it
+        self.analyzer = DatabaseAnalyzer(db_path, 
+                                         progress=lambda kind, data: app.post_to_ui(self.show_event, kind, data))
+        app.run_in_background(self.analyzer.run, self.on_finished, self.on_error)
+    
+    def show_event(self, kind, data):
+        if not self.window.winfo_exists():
+            return
+        tree = self.tree
+        if kind == 'layout':
+            for label, value in (
+                    ("Size", f"{format_size(data['file_bytes'])} ({data['page_count']:,} pages "
+                             f"of {data['page_size']:,} B)"),
+                    ("Free pages", f"{data['freelist_count']:,} ({data['freelist_ratio']:.1%})"),
+                    ("Journal mode", data['journal_mode']),
+                    ("Planner statistics", "present" if data['analyzed'] else "missing")):
+                tree.insert('layout', tk.END, text=label, values=(value,))
+        elif kind == 'wal':
+            tree.insert('layout', tk.END, text="WAL file", values=(format_size(data),))
+        elif kind == 'table':
+            table, rows, seconds = data
+            tree.insert('tables', tk.END, text=table, values=(f"{rows:,}",))
+            self.status_var.set(f"Counted {table} in {format_duration(seconds)}")
+        elif kind == 'index':
+            name, size, detail = data
+            if name is None:
+                tree.insert('indexes', tk.END, text=detail, values=("",))
+            else:
+                tree.insert('indexes', tk.END, text=f"{name} ({detail})", values=(format_size(size),))
+        elif kind == 'query':
+            label, result = data
+            value = result['error'] or f"{result['seconds'] * 1000:.1f} ms"
+            tree.insert('queries', tk.END, text=label, values=(value,))
+        elif kind == 'recommendation':
+            self.recommendations.config(state=tk.NORMAL)
+            self.recommendations.insert(tk.END, f"\u2022 {data}\n")
+            self.recommendations.config(state=tk.DISABLED)
+    
+    def on_finished(self, report):
+        if self.window.winfo_exists():
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("Analysis cancelled; results are partial." if self.analyzer.cancelled 
+                                else "Analysis finished.")
+    
+    def on_error(self, error):
+        if self.window.winfo_exists():
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set(f"Analysis failed: {error}")
+    
+    def cancel(self):
+        self.analyzer.cancel()
+    
+    def close(self):
+        self.analyzer.cancel()
+        self.window.destroy()
+
+class LogViewerWindow:
+    """Log viewer that only renders the lines currently in view
+    
+    The Text widget never holds more than one screenful; scrolling, the
+    level filter and search all work on line numbers from the LogIndex.
+    """
+    
+    # How often new lines are picked up in follow mode
+    FOLLOW_MS = 1000
+    
+    LEVEL_COLORS = {'trace': 'gray50', 'debug': 'gray40', 'warn': '#b06000', 
+                    'error': '#c00000', 'fatal': '#c00000'}
+    
+    def __init__(self, app, log_file):
+        self.app = app
+        self.index = LogIndex(log_file)
+        # Line numbers matching the filter, or None to show every line
+        self.view = None
+        # Lines [0, view_end) have been checked against the filter
+        self.view_end = 0
+        self.filter = (0, None)
+        self.generation = self.index.generation
+        self.top = 0
+        self.indexing = False
+        # Set while newly indexed lines are being filtered on a worker thread
+        self.extending = False
+        self.closed = False
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title(f"Log - {os.path.basename(log_file)}")
+        self.window.geometry("900x560")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        controls = ttk.Frame(frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Level:").pack(side=tk.LEFT)
+        self.level_var = tk.StringVar(value="all")
+        level_box = ttk.Combobox(controls, textvariable=self.level_var, state="readonly", width=8, 
+                                 values=["all"] + [f"{name}+" for name in LEVELS[1:]])
+        level_box.pack(side=tk.LEFT, padx=(5, 10))
+        level_box.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+        ttk.Label(controls, text="Contains:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(controls, textvariable=self.search_var, width=30)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.apply_filter())
+        ttk.Button(controls, text="Filter", command=self.apply_filter).pack(side=tk.LEFT)
+        self.follow_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(controls, text="Follow", variable=self.follow_var, 
+                        command=self.render).pack(side=tk.RIGHT)
+        
+        self.status_var = tk.StringVar(value="Indexing...")
+        ttk.Label(frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(5, 5))
+        
+        body = ttk.Frame(frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(body, wrap=tk.NONE, font=("Courier", 9), state=tk.DISABLED)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scrollbar)
+        xscroll = ttk.Scrollbar(body, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(xscrollcommand=xscroll.set)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        xscroll.grid(row=1, column=0, sticky="ew")
+        body.rowconfigure(0, weight=1)
+        body.columnconfigure(0, weight=1)
+        for level, color in self.LEVEL_COLORS.items():
+            self.text.tag_configure(level, foreground=color)
+        self.line_height = tkfont.Font(font=self.text.cget('font')).metrics('linespace')
+        
+        # The text only holds the visible lines, so it does its own scrolling
+        self.text.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.text.bind("<Button-5>", lambda event: self.scroll(3))
+        self.text.bind("<Prior>", lambda event: self.scroll(-self.visible_rows()))
+        self.text.bind("<Next>", lambda event: self.scroll(self.visible_rows()))
+        self.text.bind("<Configure>", lambda event: self.render())
+        
+        ttk.Button(frame, text="Close", command=self.close).pack(anchor=tk.E, pady=(10, 0))
+        
+        self.update_index()
+    
+    def row_count(self):
+        return len(self.index) if self.view is None else len(self.view)
+    
+    def visible_rows(self):
+        return max(1, self.text.winfo_height() // self.line_height)
+    
+    def update_index(self):
+        """Index whatever was appended since last time, on a worker thread"""
+        if self.closed:
+            return
+        if not self.indexing:
+            self.indexing = True
+            progress = lambda lines, done, total: self.app.post_to_ui(self.show_progress, lines, done, total)
+            self.app.run_in_background(lambda: self.index.update(progress, lambda: self.closed), 
+                                       self.on_indexed, self.on_error)
+        self.window.after(self.FOLLOW_MS, self.update_index)
+    
+    def show_progress(self, lines, done, total):
+        if not self.closed:
+            self.status_var.set(f"Indexing... {lines:,} lines ({done / total:.0%})")
+            self.render()
+    
+    def on_indexed(self, new_lines):
+        self.indexing = False
+        if self.closed:
+            return
+        if self.index.generation != self.generation:
+            # Truncated or rotated: line numbers start over
+            self.generation = self.index.generation
+            self.top = 0
+            self.apply_filter()
+            return
+        if self.view is not None and self.view_end < len(self.index) and not self.extending:
+            self.extend_view()
+        self.show_counts()
+        self.render()
+    
+    def extend_view(self):
+        """Filter the lines indexed since the view was built, on a worker thread"""
+        min_level, text = self.filter
+        start, count = self.view_end, len(self.index)
+        generation = self.index.generation
+        self.extending = True
+        
+        def done(numbers):
+            self.extending = False
+            # Dropped if the filter was re-run or the file reset meanwhile
+            if (self.closed or self.view is None or self.filter != (min_level, text)
+                    or self.index.generation != generation or self.view_end != start):
+                return
+            self.view.extend(numbers)
+            self.view_end = count
+            self.show_counts()
+            self.render()
+        
+        def failed(error):
+            self.extending = False
+            if not self.closed:
+                self.status_var.set(f"Failed to filter log: {error}")
+        
+        self.app.run_in_background(lambda: self.index.matching_lines(min_level, text, start, count), 
+                                   done, failed)
+    
+    def on_error(self, error):
+        self.indexing = False
+        if not self.closed:
+            self.status_var.set(f"Failed to read log: {error}")
+    
+    def show_counts(self):
+        total = len(self.index)
+        if self.view is None:
+            self.status_var.set(f"{total:,} lines")
+        else:
+            self.status_var.set(f"{len(self.view):,} of {total:,} lines match")
+    
+    def apply_filter(self):
+        level = self.level_var.get().rstrip('+')
+        min_level = LEVEL_CODES.get(level, 0)
+        text = self.search_var.get() or None
+        self.filter = (min_level, text)
+        if not min_level and not text:
+            self.view = None
+            self.show_counts()
+            self.render()
+            return
+        self.status_var.set("Filtering...")
+        generation = self.index.generation
+        
+        def work():
+            count = len(self.index)
+            return count, self.index.matching_lines(min_level, text, 0, count)
+        
+        def done(result):
+            # Ignore results of a filter that was replaced or a file that was reset meanwhile
+            if self.closed or self.filter != (min_level, text) or self.index.generation != generation:
+                return
+            self.view_end, self.view = result
+            self.top = 0
+            self.show_counts()
+            self.render()
+        
+        self.app.run_in_background(work, done, self.on_error)
+    
+    def scroll(self, rows):
+        self.follow_var.set(False)
+        self.top += rows
+        self.render()
+        return "break"
+    
+    def on_scrollbar(self, action, amount, unit=None):
+        rows = self.row_count()
+        if action == 'moveto':
+            self.top = int(float(amount) * rows)
+        else:
+            step = self.visible_rows() if unit == 'pages' else 1
+            self.top += int(amount) * step
+        self.follow_var.set(False)
+        self.render()
+    
+    def render(self):
+        """Replace the text with the lines that fit in the widget at ``self.top``"""
+        if self.closed:
+            return
+        rows = self.row_count()
+        visible = self.visible_rows()
+        if self.follow_var.get():
+            self.top = rows - visible
+        self.top = max(0, min(self.top, rows - visible))
+        stop = min(rows, self.top + visible)
+        numbers = range(self.top, stop) if self.view is None else self.view[self.top:stop]
+        levels = self.index.levels
+        
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        for number, line in zip(numbers, self.index.lines(numbers)):
+            self.text.insert(tk.END, line + "\n", LEVELS[levels[number]])
+        self.text.config(state=tk.DISABLED)
+        if rows:
+            self.scrollbar.set(self.top / rows, stop / rows)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def close(self):
+        self.closed = True
+        self.index.close()
+        self.window.destroy()
+
+class ServerMonitorWindow:
+    """Window polling the running server and plotting its latency"""
+    
+    # How often the window redraws from the poller's ring buffer
+    REFRESH_MS = 500
+    
+    def __init__(self, app, address, port):
+        self.app = app
+        base_url = server_base_url(address, port)
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Server Monitor")
+        self.window.geometry("560x360")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        top = ttk.Frame(frame)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text=base_url, font=("Arial", 10, "bold")).pack(side=tk.LEFT)
+        ttk.Label(top, text="s").pack(side=tk.RIGHT)
+        self.interval_var = tk.StringVar(value="1.0")
+        ttk.Spinbox(top, from_=0.2, to=60, increment=0.5, width=6, 
+                    textvariable=self.interval_var).pack(side=tk.RIGHT)
+        ttk.Label(top, text="Poll every").pack(side=tk.RIGHT, padx=(0, 5))
+        self.interval_var.trace_add('write', lambda *args: self.set_interval())
+        
+        self.stats_var = tk.StringVar(value="Waiting for the first response...")
+        ttk.Label(frame, textvariable=self.stats_var, justify=tk.LEFT).pack(anchor=tk.W, pady=(10, 0))
+        
+        self.canvas = tk.Canvas(frame, height=180, background="white", highlightthickness=1, 
+                                highlightbackground="gray")
+        self.canvas.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.detail_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.detail_var).pack(side=tk.LEFT)
+        ttk.Button(frame, text="Close", command=self.close).pack(side=tk.RIGHT)
+        
+        # Requests run on the poller's own thread; the window only reads the
+        # ring buffer on a timer, so a slow or dead server can't stall Tk
+        self.poller = ServerPoller(base_url)
+        self.poller.start()
+        self.window.after(self.REFRESH_MS, self.refresh)
+    
+    def set_interval(self):
+        try:
+            interval = float(self.interval_var.get())
+        except ValueError:
+            return
+        if interval > 0:
+            self.poller.interval = interval
+    
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        stats = self.poller.ring.summary()
+        if stats['samples']:
+            self.stats_var.set(f"p50 {format_latency(stats['p50'])}    "
+                               f"p95 {format_latency(stats['p95'])}    "
+                               f"p99 {format_latency(stats['p99'])}    "
+                               f"errors {stats['error_rate']:.1%} of {stats['samples']} requests")
+            self.detail_var.set(f"Last: {self.poller.last_detail}")
+            self.draw_sparkline(self.poller.ring.samples())
+        self.window.after(self.REFRESH_MS, self.refresh)
+    
+    def draw_sparkline(self, samples):
+        """Latency line for successful requests, red ticks for failed ones"""
+        canvas = self.canvas
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width < 10 or height < 10:
+            return
+        capacity = self.poller.ring.capacity
+        step = width / max(1, capacity - 1)
+        # Align the newest sample with the right edge
+        offset = capacity - len(samples)
+        peak = max((latency for _, latency, ok in samples if ok), default=0) or 0.001
+        points = []
+        for i, (_, latency, ok) in enumerate(samples):
+            x = (offset + i) * step
+            if ok:
+                points.extend((x, height - 4 - (height - 8) * latency / peak))
+            else:
+                canvas.create_line(x, 0, x, height, fill="#e05050")
+        if len(points) >= 4:
+            canvas.create_line(*points, fill="#2060c0", width=1.5)
+        canvas.create_text(4, 4, anchor=tk.NW, text=f"max {format_latency(peak)}", fill="gray")
+    
+    def close(self):
+        self.poller.stop()
+        self.window.destroy()
+
+class TomlEditorWindow:
+    """Editable raw TOML kept in sync with the form in both directions
+    
+    Edits to the text are parsed a moment after typing stops, and only the
+    statements that changed are parsed again; options they set are pushed
+    into the form. Edits in the form rewrite just that option's line. Only
+    the lines on screen are highlighted.
+    """
+    
+    # Quiet time after the last keystroke before the text is parsed
+    SYNC_DELAY_MS = 300
+    
+    TAG_STYLES = {'key': {'foreground': '#00008b'}, 'table': {'foreground': '#8b008b'},
+                  'string': {'foreground': '#006400'}, 'literal': {'foreground': '#b05000'},
+                  'comment': {'foreground': 'gray50'}, 'error': {'background': '#ffd0d0'}}
+    
+    def __init__(self, app, text):
+        self.app = app
+        self.model = TomlTextModel(text)
+        self.error = None
+        self._sync_pending = None
+        self._highlight_pending = False
+        # Set while pushing text edits into the form, so they don't echo back
+        self._applying = False
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title(f"Raw TOML - {os.path.basename(app.config_file)}")
+        self.window.geometry("700x560")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        body = ttk.Frame(frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(body, wrap=tk.NONE, undo=True, font=("Courier", 10))
+        scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.text.yview)
+        xscroll = ttk.Scrollbar(body, orient=tk.HORIZONTAL, command=self.text.xview)
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.schedule_highlight()
+        
+        self.text.configure(yscrollcommand=on_scroll, xscrollcommand=xscroll.set)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        xscroll.grid(row=1, column=0, sticky="ew")
+        body.rowconfigure(0, weight=1)
+        body.columnconfigure(0, weight=1)
+        for tag, style in self.TAG_STYLES.items():
+            self.text.tag_configure(tag, **style)
+        self.text.tag_raise('error')
+        
+        self.text.insert('1.0', text)
+        self.text.edit_reset()
+        self.text.edit_modified(False)
+        self.text.bind("<<Modified>>", self.on_modified)
+        
+        self.status_var = tk.StringVar(value="Edits here and in the form are kept in sync")
+        ttk.Label(frame, textvariable=self.status_var).pack(side=tk.LEFT, pady=(10, 0))
+        ttk.Button(frame, text="Close", command=self.close).pack(side=tk.RIGHT, pady=(10, 0))
+        ttk.Button(frame, text="Save", command=self.save).pack(side=tk.RIGHT, padx=5, pady=(10, 0))
+    
+    def on_modified(self, event=None):
+        if not self.text.edit_modified():
+            return
+        self.text.edit_modified(False)
+        if self._sync_pending is not None:
+            self.window.after_cancel(self._sync_pending)
+        self._sync_pending = self.window.after(self.SYNC_DELAY_MS, self.sync)
+        self.schedule_highlight()
+    
+    def flush(self):
+        """Parse any edit still waiting for its debounce timer"""
+        if self._sync_pending is not None:
+            self.window.after_cancel(self._sync_pending)
+            self.sync()
+    
+    def sync(self):
+        """Re-parse the edited statements and push what changed into the form"""
+        self._sync_pending = None
+        if not self.window.winfo_exists():
+            return
+        result = self.model.apply_text(self.text.get('1.0', 'end-1c'))
+        self.error = result.error
+        if result.error:
+            self.status_var.set(f"Not synced: {result.error}")
+        else:
+            self.apply_to_form(result)
+            # Form edits made while the text was broken, now written
+            for edit in result.edits:
+                self.apply_edit(edit)
+            first, last = result.lines
+            scope = "whole file" if result.full else f"lines {first + 1}-{max(first + 1, last)}"
+            self.status_var.set(f"Synced {len(result.changes) + len(result.removed)} option(s), "
+                                f"parsed {scope}")
+        self.schedule_highlight()
+    
+    def apply_to_form(self, result):
+        app = self.app
+        self._applying = True
+        try:
+            for key, value in result.changes.items():
+                if key in FIELDS_BY_KEY:
+                    app.set_value(key, value)
+                else:
+                    app.config = dict(app.config, **{key: value})
+            for key in result.removed:
+                if key in FIELDS_BY_KEY:
+                    app.set_value(key, '' if key in OPTIONAL_KEYS else DEFAULTS[key])
+                else:
+                    app.config = {name: value for name, value in app.config.items() if name != key}
+        finally:
+            self._applying = False
+    
+    def on_form_changed(self, key):
+        """Rewrite the line of an option edited in the form"""
+        if self._applying or not self.window.winfo_exists():
+            return
+        self.flush()
+        raw = self.app.get_value(key)
+        try:
+            if key in OPTIONAL_KEYS and not raw:
+                edit = self.model.set_key(key)
+            else:
+                edit = self.model.set_key(key, coerce_value(key, raw))
+        except ValueError as e:
+            self.status_var.set(str(e))
+            return
+        if self.model.error:
+            self.status_var.set(f"{key} will be written to the text once this is fixed: {self.model.error}")
+        if edit is not None:
+            self.apply_edit(edit)
+    
+    def apply_edit(self, edit):
+        """Replace lines of the text with a patch_key() edit"""
+        first, count, new_lines = edit
+        self.text.delete(f"{first + 1}.0", f"{first + count + 1}.0")
+        self.text.insert(f"{first + 1}.0", ''.join(line + '\n' for line in new_lines))
+        # The text now matches the model; don't parse it again
+        self.text.edit_modified(False)
+        self.schedule_highlight()
+    
+    def schedule_highlight(self):
+        if not self._highlight_pending:
+            self._highlight_pending = True
+            self.window.after_idle(self.highlight_visible)
+    
+    def highlight_visible(self):
+        """Re-tag just the lines currently on screen"""
+        self._highlight_pending = False
+        if not self.window.winfo_exists():
+            return
+        text = self.text
+        top = int(text.index('@0,0').split('.')[0])
+        bottom = int(text.index(f'@0,{text.winfo_height()}').split('.')[0])
+        for tag in self.TAG_STYLES:
+            text.tag_remove(tag, f"{top}.0", f"{bottom + 1}.0")
+        bad_line = error_line(self.error)
+        for number in range(top, bottom + 1):
+            line = text.get(f"{number}.0", f"{number}.end")
+            for kind, start, end in highlight_spans(line, self.model.is_continuation(number - 1)):
+                text.tag_add(kind, f"{number}.{start}", f"{number}.{end}")
+            if bad_line == number - 1:
+                text.tag_add('error', f"{number}.0", f"{number}.end+1c")
+    
+    def save(self):
+        """Write the text as it is, keeping the file's line endings"""
+        app = self.app
+        self.flush()
+        content = self.text.get('1.0', 'end-1c')
+        try:
+            config = parse_toml(content)
+            document = load_document(app.config_file)
+            # Only options that differ from the file on disk are checked
+            validate_config(config, None if document is None else
+                            [key for key in config if document.data.get(key) != config[key]])
+            current = document.text if document is not None else None
+            if current is not None and '\r\n' in current:
+                content = content.replace('\n', '\r\n')
+            written = content != current
+            if written:
+                atomic_write_text(app.config_file, content)
+            if app.watcher is not None:
+                app.watcher.acknowledge()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save configuration: {str(e)}", parent=self.window)
+            return
+        
+        app.config = app._synced_config = config
+        app._dirty.clear()
+        if written:
+            self.status_var.set(f"Saved to {app.config_file} at {time.strftime('%H:%M:%S')}")
+        else:
+            self.status_var.set(f"{app.config_file} is already up to date")
+    
+    def close(self):
+        self.flush()
+        self.app.toml_editor = None
+        self.window.destroy()
+
 def main():
-    # Check if toml module is available
-    try:
-        import toml
-    except ImportError:
+    parser = argparse.ArgumentParser(description="Navidrome Configuration GUI")
+    parser.add_argument('--lazy', action='store_true',
+                        help="show the window immediately and build sections on demand")
+    parser.add_argument('--timing', action='store_true',
+                        help="print the time from startup to the first idle paint")
+    parser.add_argument('--trace', metavar='FILE', default=os.environ.get(TRACE_ENV),
+                        help="trace Tk callbacks and event-loop lag, saving Chrome trace JSON "
+                             f"to FILE on exit (or set {TRACE_ENV})")
+    parser.add_argument('--trace-threshold', metavar='MS', type=float, default=DEFAULT_THRESHOLD_MS,
+                        help="print callbacks and stalls longer than this while tracing")
+    args = parser.parse_args()
+    
+    # Parsing can fall back to tomllib, but saving needs the toml module
+    if not backend_available('toml'):
         messagebox.showerror("Missing Dependency", 
                            "The 'toml' module is required. Please install it with:\npip install toml")
         return
     
+    # Callbacks are wrapped as they are registered, so this must come first
+    tracer = enable_tracing(args.trace, args.trace_threshold) if args.trace else None
+    
     root = tk.Tk()
-    app = NavidromeConfigGUI(root)
+    if tracer is not None:
+        tracer.start_heartbeat(root)
+    app = NavidromeConfigGUI(root, lazy=args.lazy)
+    if args.timing:
+        def report_first_paint():
+            print(f"Time to first paint: {app.first_paint_seconds * 1000:.1f} ms", file=sys.stderr)
+        root.after_idle(report_first_paint)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+"""Format-preserving, incremental and atomic writer for navidrome.toml.
+
+Only changed top-level keys are rewritten, and the file is replaced through
+a fsynced temporary file, or not written at all if nothing changed.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from navidrome_config_cache import load_document, parse_toml
+
+try:
+    import toml
+except ImportError:
+    toml = None
+
+KEY_RE = re.compile(r'''^(\s*)("(?:[^"\\]|\\.)*"|'[^']*'|[A-Za-z0-9_\-.]+)\s*=\s*''')
+
+
+def scan_value(text, state=None):
+    """Scan part of a TOML value, tracking brackets and (multi-line) strings
+
+    ``state`` is ``(bracket_depth, open_multiline_delimiter)`` carried over
+    from the previous line. Returns the new state and the index where a
+    trailing comment starts (or None).
+    """
+    depth, delimiter = state or (0, None)
+    i = 0
+    length = len(text)
+    while i < length:
+        if delimiter:
+            end = text.find(delimiter, i)
+            if end < 0:
+                return (depth, delimiter), None
+            # A run of more than three quotes closes on the last three
+            while text.startswith(delimiter[0], end + 3) and end + 3 < length:
+                end += 1
+            i = end + 3
+            delimiter = None
+            continue
+        char = text[i]
+        if text.startswith('"""', i) or text.startswith("'''", i):
+            delimiter = text[i:i + 3]
+            i += 3
+        elif char == '"':
+            i += 1
+            while i < length and text[i] != '"':
+                i += 2 if text[i] == '\\' else 1
+            i += 1
+        elif char == "'":
+            end = text.find("'", i + 1)
+            i = length if end < 0 else end + 1
+        elif char in '[{':
+            depth += 1
+            i += 1
+        elif char in ']}':
+            depth -= 1
+            i += 1
+        elif char == '#':
+            return (depth, None), i
+        else:
+            i += 1
+    return (depth, delimiter), None
+
+
+def unquote_key(key):
+    if key[0] in '"\'':
+        return parse_toml(f"k = {key}")['k']
+    return key
+
+
+def _dumps(data):
+    # Parsing can use any backend, but only the toml package can write
+    if toml is None:
+        raise ImportError("The 'toml' module is required to save. Please install it with: pip install toml")
+    return toml.dumps(data)
+
+
+def scan_root_keys(lines):
+    """Locate top-level ``key = value`` entries before the first table header
+
+    Returns ``(entries, root_end)``: ``entries`` maps each key to
+    ``(first_line, last_line, comment)`` where comment is the trailing
+    comment of a single-line value (with its leading spaces), and ``root_end`` is the index of the
+    first table header (or ``len(lines)``).
+    """
+    entries = {}
+    i = 0
+    while i < len(lines):
+        stripped = lines[i].strip()
+        if not stripped or stripped.startswith('#'):
+            i += 1
+            continue
+        if stripped.startswith('['):
+            return entries, i
+        match = KEY_RE.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        value_text = lines[i][match.end():]
+        state, comment_at = scan_value(value_text)
+        first = i
+        while (state[0] > 0 or state[1]) and i + 1 < len(lines):
+            i += 1
+            state, comment_at = scan_value(lines[i], state)
+        comment = None
+        if first == i and comment_at is not None:
+            # Keep the original spacing before the comment too
+            comment = value_text[len(value_text[:comment_at].rstrip()):].rstrip()
+        entries[unquote_key(match.group(2))] = (first, i, comment)
+        i += 1
+    return entries, len(lines)
+
+
+def format_value(value):
+    """Render a value the way toml.dump would on the right of ``key =``"""
+    return _dumps({'k': value})[len('k = '):].rstrip('\n')
+
+
+def format_key(key):
+    return key if re.fullmatch(r'[A-Za-z0-9_\-]+', key) else _dumps({key: 0}).split(' = ')[0]
+
+
+def patch_toml_text(text, changes, removed=()):
+    """Return ``text`` with top-level keys set to ``changes`` and ``removed`` keys deleted
+
+    Unchanged lines, comments and tables are preserved. Returns None when a
+    change cannot be patched in place (a table value, or a key that only
+    exists as a table or dotted key), in which case the caller should fall
+    back to rewriting the whole document.
+    """
+    newline = '\r\n' if '\r\n' in text else '\n'
+    lines = text.splitlines()
+    entries, root_end = scan_root_keys(lines)
+
+    replacements = {}
+    additions = []
+    for key, value in changes.items():
+        if isinstance(value, dict):
+            return None
+        if key in entries:
+            first, last, comment = entries[key]
+            indent = KEY_RE.match(lines[first]).group(1)
+            new_line = f"{indent}{format_key(key)} = {format_value(value)}"
+            if comment:
+                new_line += comment
+            replacements[first] = (last, [new_line])
+        else:
+            if re.search(rf'^\s*\[+\s*"?{re.escape(key)}"?\s*[\].]', text, re.MULTILINE):
+                return None
+            additions.append(f"{format_key(key)} = {format_value(value)}")
+    for key in removed:
+        if key in entries:
+            first, last, _ = entries[key]
+            replacements[first] = (last, [])
+
+    # Apply bottom-up so earlier line numbers stay valid
+    if additions:
+        if entries:
+            insert_at = max(last for _, last, _ in entries.values()) + 1
+        else:
+            insert_at = root_end
+            if root_end < len(lines):
+                additions.append('')
+        lines[insert_at:insert_at] = additions
+        shift = len(additions)
+        replacements = {first + (shift if first >= insert_at else 0):
+                        (last + (shift if last >= insert_at else 0), new)
+                        for first, (last, new) in replacements.items()}
+    for first in sorted(replacements, reverse=True):
+        last, new = replacements[first]
+        lines[first:last + 1] = new
+
+    result = newline.join(lines)
+    if lines and (text.endswith(('\n', '\r')) or not text):
+        result += newline
+    return result
+
+
+def render_config(path, config):
+    """New file content for ``config``, patched over the current content of ``path``
+
+    Returns ``(current_text, new_text)``; ``current_text`` is None when the
+    file does not exist yet.
+    """
+    document = load_document(path)
+    if document is None:
+        return None, _dumps(config)
+
+    current_text, current = document.text, document.data
+    changes = {key: value for key, value in config.items() if current.get(key) != value}
+    removed = [key for key in current if key not in config]
+    if not changes and not removed:
+        return current_text, current_text
+
+    new_text = patch_toml_text(current_text, changes, removed)
+    if new_text is None or not _round_trips(new_text, config):
+        # Fall back to a full rewrite rather than writing something that
+        # doesn't parse back to the requested config
+        new_text = _dumps(config)
+    return current_text, new_text
+
+
+def _round_trips(text, config):
+    try:
+        return parse_toml(text) == config
+    except ValueError:
+        # Both tomllib.TOMLDecodeError and toml.TomlDecodeError are ValueErrors
+        return False
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def atomic_write_text(path, text):
+    """Write ``text`` via a fsynced temporary file renamed over ``path``"""
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        else:
+            # mkstemp creates files readable only by their owner
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself; directories can't be opened on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_config_file(path, config):
+    """Save ``config`` to ``path``, touching only what changed
+
+    Returns True if the file was written, False if its content already
+    matched and the write was skipped.
+    """
+    current_text, new_text = render_config(path, config)
+    if current_text is not None and content_hash(new_text) == content_hash(current_text):
+        return False
+    atomic_write_text(path, new_text)
+    return True
@@ -0,0 +1,252 @@
+"""Read-only analyzer for Navidrome's SQLite database (DbPath).
+
+Reports layout, WAL size, table and index sizes and query timings one
+step at a time, so cheap results show up before slow ones.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from navidrome_config_core import format_size
+
+# Free pages above this share of the file make VACUUM worthwhile
+FREELIST_VACUUM_RATIO = 0.10
+
+# A WAL this large relative to the database suggests checkpoints are starved
+WAL_CHECKPOINT_RATIO = 0.25
+
+# Representative browsing queries: (label, SQL, tables they need)
+QUERIES = [
+    ("Albums by name", "SELECT id FROM album ORDER BY name LIMIT 100", ('album',)),
+    ("Artists by name", "SELECT id FROM artist ORDER BY name LIMIT 100", ('artist',)),
+    ("Tracks of one album",
+     "SELECT id FROM media_file WHERE album_id = (SELECT id FROM album LIMIT 1)",
+     ('album', 'media_file')),
+    ("Track lookup by path",
+     "SELECT id FROM media_file WHERE path = (SELECT path FROM media_file LIMIT 1)",
+     ('media_file',)),
+    ("Recently added albums", "SELECT id FROM album ORDER BY created_at DESC LIMIT 100",
+     ('album',)),
+]
+
+# Queries slower than this are flagged in the recommendations
+SLOW_QUERY_SECONDS = 0.2
+
+
+def connect_read_only(path):
+    """Open ``path`` read-only; raises FileNotFoundError instead of creating it"""
+    path = Path(path).resolve()
+    if not path.is_file():
+        raise FileNotFoundError(f"Database not found: {path}")
+    return sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class DatabaseAnalyzer:
+    """Analyze a database on the calling thread, streaming results to ``progress``
+
+    ``progress(kind, data)`` is called with kind 'layout', 'wal', 'table',
+    'index', 'query' or 'recommendation' as each result becomes available.
+    :meth:`run` returns the full report dict.
+    """
+
+    def __init__(self, path, progress=None):
+        self.path = path
+        self.progress = progress
+        self.cancelled = False
+        self.report = {'layout': None, 'wal_bytes': 0, 'tables': {}, 'indexes': {},
+                       'queries': {}, 'recommendations': []}
+        self._connection = None
+        # Held around interrupt() and while the connection is detached, so
+        # a cancel never interrupts a connection that is being closed
+        self._connection_lock = threading.Lock()
+
+    def cancel(self):
+        """Stop the analysis, interrupting the running statement; safe from any thread"""
+        self.cancelled = True
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.interrupt()
+
+    def _emit(self, kind, data):
+        if self.progress is not None:
+            self.progress(kind, data)
+
+    def run(self):
+        self._connection = connect_read_only(self.path)
+        try:
+            steps = (self._layout, self._wal, self._tables, self._indexes, self._queries)
+            for step in steps:
+                if self.cancelled:
+                    break
+                try:
+                    step()
+                except sqlite3.OperationalError:
+                    if self.cancelled:
+                        break
+                    raise
+        finally:
+            with self._connection_lock:
+                connection, self._connection = self._connection, None
+            connection.close()
+        if not self.cancelled:
+            for recommendation in recommend(self.report):
+                self.report['recommendations'].append(recommendation)
+                self._emit('recommendation', recommendation)
+        return self.report
+
+    def _pragma(self, name):
+        return self._connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def _layout(self):
+        layout = {name: self._pragma(name) for name in
+                  ('page_size', 'page_count', 'freelist_count', 'journal_mode', 'auto_vacuum')}
+        layout['file_bytes'] = layout['page_size'] * layout['page_count']
+        layout['freelist_ratio'] = (layout['freelist_count'] / layout['page_count']
+                                    if layout['page_count'] else 0.0)
+        layout['analyzed'] = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is not None
+        self.report['layout'] = layout
+        self._emit('layout', layout)
+
+    def _wal(self):
+        try:
+            size = os.path.getsize(str(Path(self.path).resolve()) + '-wal')
+        except OSError:
+            size = 0
+        self.report['wal_bytes'] = size
+        self._emit('wal', size)
+
+    def _names(self, kind):
+        return [row[0] for row in self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = ? AND name NOT LIKE 'sqlite_%' ORDER BY name",
+            (kind,))]
+
+    def _tables(self):
+        for table in self._names('table'):
+            if self.cancelled:
+                return
+            start = time.perf_counter()
+            rows = self._connection.execute(f"SELECT count(*) FROM {quote_identifier(table)}").fetchone()[0]
+            self.report['tables'][table] = rows
+            self._emit('table', (table, rows, time.perf_counter() - start))
+
+    def _indexes(self):
+        # dbstat reads every page of the object, so ask for one index at a time
+        # to keep results flowing; it is missing from some SQLite builds
+        try:
+            self._connection.execute("SELECT 1 FROM dbstat LIMIT 1")
+        except sqlite3.OperationalError as e:
+            if self.cancelled:
+                raise
+            self._emit('index', (None, None, f"index sizes unavailable ({e})"))
+            return
+        rows = self._connection.execute(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' ORDER BY tbl_name, name").fetchall()
+        for name, table in rows:
+            if self.cancelled:
+                return
+            pages = self._connection.execute(
+                "SELECT count(*) FROM dbstat WHERE name = ?", (name,)).fetchone()[0]
+            size = pages * self.report['layout']['page_size']
+            self.report['indexes'][name] = size
+            self._emit('index', (name, size, table))
+
+    def _queries(self):
+        tables = set(self.report['tables'])
+        for label, sql, needs in QUERIES:
+            if self.cancelled:
+                return
+            if not tables.issuperset(needs):
+                continue
+            try:
+                plan = ' '.join(row[-1] for row in self._connection.execute(f"EXPLAIN QUERY PLAN {sql}"))
+                start = time.perf_counter()
+                self._connection.execute(sql).fetchall()
+                result = {'seconds': time.perf_counter() - start, 'plan': plan, 'error': None}
+            except sqlite3.OperationalError as e:
+                if self.cancelled:
+                    raise
+                # Older schemas lack some columns
+                result = {'seconds': None, 'plan': '', 'error': str(e)}
+            self.report['queries'][label] = result
+            self._emit('query', (label, result))
+
+
+def recommend(report):
+    """Maintenance and journal recommendations for a finished report"""
+    layout = report['layout']
+    recommendations = []
+    if layout is None:
+        return recommendations
+    if layout['freelist_ratio'] > FREELIST_VACUUM_RATIO:
+        free_bytes = layout['freelist_count'] * layout['page_size']
+        recommendations.append(
+            f"Run VACUUM while Navidrome is stopped: {layout['freelist_ratio']:.0%} of the file "
+            f"({format_size(free_bytes)}) is free pages left behind by deleted rows.")
+    slow = [label for label, result in report['queries'].items()
+            if result['seconds'] is not None and result['seconds'] > SLOW_QUERY_SECONDS]
+    if not layout['analyzed']:
+        recommendations.append(
+            "Run ANALYZE (or PRAGMA optimize): the database has no planner statistics, "
+            "so SQLite has to guess which index to use.")
+    elif slow:
+        recommendations.append(f"Run ANALYZE to refresh planner statistics; slow queries: {', '.join(slow)}.")
+    if str(layout['journal_mode']).lower() != 'wal':
+        recommendations.append(
+            f"Journal mode is {layout['journal_mode']}; WAL lets scans and playback requests "
+            "read while the scanner writes.")
+    elif layout['file_bytes'] and report['wal_bytes'] > layout['file_bytes'] * WAL_CHECKPOINT_RATIO:
+        recommendations.append(
+            f"The WAL file is {format_size(report['wal_bytes'])}, large next to the "
+            f"{format_size(layout['file_bytes'])} database: checkpoints are not keeping up. "
+            "Run PRAGMA wal_checkpoint(TRUNCATE) during a quiet period.")
+    if not recommendations:
+        recommendations.append("No maintenance needed.")
+    return recommendations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a Navidrome database without modifying it")
+    parser.add_argument('database', help="path to navidrome.db")
+    args = parser.parse_args(argv)
+
+    def progress(kind, data):
+        if kind == 'layout':
+            print(f"Page size {data['page_size']}, {data['page_count']:,} pages "
+                  f"({format_size(data['file_bytes'])}), {data['freelist_ratio']:.1%} free, "
+                  f"journal {data['journal_mode']}, "
+                  f"{'analyzed' if data['analyzed'] else 'never analyzed'}")
+        elif kind == 'wal':
+            print(f"WAL: {format_size(data)}")
+        elif kind == 'table':
+            print(f"Table {data[0]}: {data[1]:,} rows")
+        elif kind == 'index':
+            print(data[2] if data[0] is None else f"Index {data[0]} on {data[2]}: {format_size(data[1])}")
+        elif kind == 'query':
+            label, result = data
+            timing = result['error'] or f"{result['seconds'] * 1000:.1f} ms"
+            print(f"Query '{label}': {timing}")
+        else:
+            print(f"* {data}")
+
+    analyzer = DatabaseAnalyzer(args.database, progress)
+    try:
+        analyzer.run()
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        analyzer.cancel()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
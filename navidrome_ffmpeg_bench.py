@@ -0,0 +1,219 @@
+"""FFmpeg transcoding throughput benchmark for choosing TranscodingFormat."""
+import argparse
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from navidrome_config_core import CHOICES, FORMAT_BITRATES
+from navidrome_library import AUDIO_EXTENSIONS
+
+# Encoder arguments for each format, matching Navidrome's default transcodings
+FORMAT_ARGS = {
+    'mp3': ['-c:a', 'libmp3lame', '-f', 'mp3'],
+    'aac': ['-c:a', 'aac', '-f', 'adts'],
+    'ogg': ['-c:a', 'libvorbis', '-f', 'ogg'],
+    'opus': ['-c:a', 'libopus', '-f', 'opus'],
+}
+
+# Seconds of audio transcoded per job, so long tracks don't dominate
+SAMPLE_SECONDS = 60
+
+# A stream needs to be transcoded this much faster than it plays to avoid
+# stutters when the host is also doing other work
+REALTIME_MARGIN = 1.2
+
+BENCH_RE = re.compile(r'bench: utime=([0-9.]+)s stime=([0-9.]+)s rtime=([0-9.]+)s')
+DURATION_RE = re.compile(r'Duration: (\d+):(\d+):([0-9.]+)')
+
+
+def default_concurrency_levels(limit=None):
+    """1, 2, 4, ... up to twice the number of CPUs"""
+    limit = limit or (os.cpu_count() or 1) * 2
+    levels = []
+    level = 1
+    while level < limit:
+        levels.append(level)
+        level *= 2
+    levels.append(limit)
+    return levels
+
+
+def find_sample_tracks(music_folder, count=8, max_dirs=500, seed=None):
+    """Pick up to ``count`` audio files from the first ``max_dirs`` folders of a library"""
+    candidates = []
+    for dirs_seen, (dirpath, dirnames, filenames) in enumerate(os.walk(music_folder)):
+        candidates.extend(os.path.join(dirpath, name) for name in filenames
+                          if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS)
+        if dirs_seen >= max_dirs or len(candidates) >= count * 20:
+            break
+    random.Random(seed).shuffle(candidates)
+    return candidates[:count]
+
+
+def tone_input(index):
+    """ffmpeg input arguments for a generated stereo test tone"""
+    frequency = 220 + 110 * (index % 8)
+    return ['-f', 'lavfi', '-i',
+            f'sine=frequency={frequency}:sample_rate=44100:duration={SAMPLE_SECONDS}',
+            '-ac', '2']
+
+
+def transcode_once(ffmpeg_path, input_args, transcoding_format, timeout=None):
+    """Run one ffmpeg transcode to the null device
+
+    Returns a dict with ``media_seconds``, ``cpu_seconds`` and
+    ``wall_seconds`` taken from ffmpeg's ``-benchmark`` output.
+    """
+    bitrate = f"{FORMAT_BITRATES[transcoding_format]}k"
+    command = ([ffmpeg_path, '-hide_banner', '-nostdin', '-benchmark', '-y']
+               + input_args
+               + ['-t', str(SAMPLE_SECONDS), '-vn', '-map', '0:a:0', '-b:a', bitrate]
+               + FORMAT_ARGS[transcoding_format]
+               + [os.devnull])
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                             timeout=timeout, text=True, errors='replace')
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"ffmpeg exited with code {process.returncode}")
+
+    bench = BENCH_RE.search(process.stderr)
+    if not bench:
+        raise RuntimeError("ffmpeg did not report -benchmark timings")
+    utime, stime, rtime = (float(value) for value in bench.groups())
+
+    duration = DURATION_RE.search(process.stderr)
+    media_seconds = SAMPLE_SECONDS
+    if duration:
+        hours, minutes, seconds = duration.groups()
+        media_seconds = min(SAMPLE_SECONDS, int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    return {'media_seconds': media_seconds, 'cpu_seconds': utime + stime, 'wall_seconds': rtime}
+
+
+class FFmpegBenchmark:
+    """Benchmark each format at increasing concurrency
+
+    ``samples`` is a list of track paths; when empty, generated tones are
+    used. ``progress`` is called from the benchmark thread with a short
+    status string before each step.
+    """
+
+    def __init__(self, ffmpeg_path, samples=None, formats=None, levels=None, progress=None):
+        self.ffmpeg_path = ffmpeg_path or 'ffmpeg'
+        self.samples = list(samples or [])
+        self.formats = formats or CHOICES['TranscodingFormat']
+        self.levels = levels or default_concurrency_levels()
+        self.progress = progress
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop after the ffmpeg processes currently running"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _input_args(self, index):
+        if self.samples:
+            return ['-i', self.samples[index % len(self.samples)]]
+        return tone_input(index)
+
+    def _report(self, message):
+        if self.progress is not None:
+            self.progress(message)
+
+    def run_level(self, transcoding_format, level):
+        """Run ``level`` transcodes at once and return their individual timings"""
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            futures = [executor.submit(transcode_once, self.ffmpeg_path, self._input_args(i),
+                                       transcoding_format, SAMPLE_SECONDS * 20)
+                       for i in range(level)]
+            return [future.result() for future in futures]
+
+    def benchmark_format(self, transcoding_format):
+        """Result dict for one format; ``error`` is set if ffmpeg could not encode it"""
+        result = {'format': transcoding_format, 'levels': [], 'error': None}
+        for level in self.levels:
+            if self.cancelled:
+                break
+            self._report(f"{transcoding_format}: {level} concurrent stream(s)...")
+            try:
+                runs = self.run_level(transcoding_format, level)
+            except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+                result['error'] = str(e)
+                break
+            media = sum(run['media_seconds'] for run in runs)
+            cpu = sum(run['cpu_seconds'] for run in runs)
+            slowest = min(run['media_seconds'] / run['wall_seconds'] if run['wall_seconds'] else float('inf')
+                          for run in runs)
+            result['levels'].append({
+                'concurrency': level,
+                'min_realtime_factor': slowest,
+                'cpu_seconds_per_minute': cpu / (media / 60) if media else 0.0,
+            })
+            # Once streams fall below realtime, higher levels only get worse
+            if slowest < REALTIME_MARGIN:
+                break
+
+        levels = result['levels']
+        if levels:
+            single = levels[0]
+            result['realtime_factor'] = single['min_realtime_factor']
+            result['cpu_seconds_per_minute'] = single['cpu_seconds_per_minute']
+            result['max_streams'] = max((entry['concurrency'] for entry in levels
+                                         if entry['min_realtime_factor'] >= REALTIME_MARGIN), default=0)
+            # True when even the highest level tried kept up, so the host
+            # can probably serve more streams than were tested
+            result['max_streams_is_lower_bound'] = result['max_streams'] == self.levels[-1]
+        return result
+
+    def run(self):
+        """Benchmark every format, returning a list of result dicts"""
+        results = []
+        for transcoding_format in self.formats:
+            if self.cancelled:
+                break
+            results.append(self.benchmark_format(transcoding_format))
+        return results
+
+
+def format_streams(result):
+    """Max streams for display, e.g. '6' or '>= 16'"""
+    if result.get('max_streams_is_lower_bound'):
+        return f">= {result['max_streams']}"
+    return str(result.get('max_streams', 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure FFmpeg transcoding throughput per format")
+    parser.add_argument('--ffmpeg', default='ffmpeg', help="path to the ffmpeg binary")
+    parser.add_argument('--music-folder', help="take sample tracks from this library "
+                                               "(default: generated test tones)")
+    parser.add_argument('--samples', type=int, default=8, help="number of sample tracks")
+    parser.add_argument('-f', '--format', dest='formats', action='append',
+                        choices=CHOICES['TranscodingFormat'], help="format to test; may be repeated")
+    parser.add_argument('--max-concurrency', type=int, help="highest number of concurrent streams to try")
+    args = parser.parse_args(argv)
+
+    samples = find_sample_tracks(args.music_folder, args.samples) if args.music_folder else []
+    benchmark = FFmpegBenchmark(args.ffmpeg, samples, args.formats,
+                                default_concurrency_levels(args.max_concurrency),
+                                progress=lambda message: print(message, file=sys.stderr))
+    results = benchmark.run()
+
+    print(f"{'Format':<8}{'Realtime':>10}{'CPU s/min':>11}{'Max streams':>13}")
+    for result in results:
+        if result['error']:
+            print(f"{result['format']:<8}  error: {result['error']}")
+        elif result['levels']:
+            print(f"{result['format']:<8}{result['realtime_factor']:>9.1f}x"
+                  f"{result['cpu_seconds_per_minute']:>11.2f}{format_streams(result):>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
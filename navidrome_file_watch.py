@@ -0,0 +1,161 @@
+"""Watch a single config file for changes made by other programs.
+
+Uses inotify on Linux and polls the file's mtime and size elsewhere.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import threading
+
+# inotify event masks (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def file_digest(path):
+    """SHA-256 of a file's content, or None if it can't be read"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _load_inotify():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class FileWatcher:
+    """Call ``callback(path)`` from a background thread when ``path``'s content changes
+
+    ``debounce`` is how long the file must be quiet before the callback
+    fires; ``poll_interval`` is only used when inotify is unavailable.
+    """
+
+    def __init__(self, path, callback, debounce=0.5, poll_interval=2.0):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._digest = file_digest(self.path)
+        self._stop = threading.Event()
+        self._thread = None
+        self._wake_r, self._wake_w = os.pipe() if hasattr(os, 'pipe') and os.name != 'nt' else (None, None)
+        self._libc = _load_inotify()
+
+    @property
+    def uses_inotify(self):
+        return self._libc is not None and self._wake_r is not None
+
+    def start(self):
+        target = self._run_inotify if self.uses_inotify else self._run_polling
+        self._thread = threading.Thread(target=target, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b'x')
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+
+    def acknowledge(self):
+        """Record the file's current content as seen, e.g. right after saving it ourselves"""
+        self._digest = file_digest(self.path)
+
+    def _check(self):
+        """Fire the callback if the content differs from the last one seen"""
+        digest = file_digest(self.path)
+        if digest is not None and digest != self._digest:
+            self._digest = digest
+            self.callback(self.path)
+
+    def _run_polling(self):
+        def signature():
+            try:
+                stat = os.stat(self.path)
+                return stat.st_mtime_ns, stat.st_size
+            except OSError:
+                return None
+
+        last = signature()
+        while not self._stop.wait(self.poll_interval):
+            current = signature()
+            if current == last:
+                continue
+            # Wait for the writer to finish before hashing
+            while not self._stop.wait(self.debounce):
+                settled = signature()
+                if settled == current:
+                    break
+                current = settled
+            last = current
+            if not self._stop.is_set():
+                self._check()
+
+    def _run_inotify(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return self._run_polling()
+        directory = os.path.dirname(self.path)
+        name = os.fsencode(os.path.basename(self.path))
+        try:
+            if self._libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+                return self._run_polling()
+            pending = False
+            while not self._stop.is_set():
+                # Sleep until something happens; only time out while debouncing
+                ready, _, _ = select.select([fd, self._wake_r], [], [],
+                                            self.debounce if pending else None)
+                if self._stop.is_set():
+                    break
+                if not ready:
+                    pending = False
+                    self._check()
+                    continue
+                if fd in ready and self._read_events(fd, name):
+                    pending = True
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd, name):
+        """Drain queued inotify events; True if any concern the watched file"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                if data[offset:offset + length].rstrip(b'\0') == name:
+                    relevant = True
+                offset += length
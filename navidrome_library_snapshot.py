@@ -0,0 +1,419 @@
+"""Persistent MusicFolder snapshot for measuring how fast a library changes.
+
+Folders whose mtime is unchanged are copied from the previous snapshot
+instead of being listed again; ``--deep`` checks every file.
+"""
+import argparse
+import csv
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from navidrome_library import DEFAULT_WORKERS, format_duration
+
+SNAPSHOT_FILE = 'navigui-library.snapshot'
+HISTORY_FILE = 'navigui-library-churn.csv'
+HISTORY_FIELDS = ['timestamp', 'files', 'added', 'removed', 'modified', 'seconds', 'deep']
+
+# Passes closer together than this don't give a churn rate
+MIN_RATE_SECONDS = 3600
+
+# magic, byte order, root path length, created, folders, files, folder name
+# bytes, file name bytes
+HEADER = struct.Struct('<8s1sxxxIdqqqq')
+MAGIC = b'NVGSNAP1'
+
+
+class LibrarySnapshot:
+    """Folders and files of a library tree in array form
+
+    Folder ``d`` has parent ``dir_parent[d]`` (-1 for the root), and its
+    files are ``file_*[dir_first[d]:dir_first[d] + dir_files[d]]``, whose
+    names are stored back to back in ``file_names`` from
+    ``dir_names_start[d]``. Parents always come before their children.
+    """
+
+    def __init__(self, root, created=None):
+        self.root = root
+        self.created = created if created is not None else time.time()
+        self.dir_parent = array('q')
+        self.dir_mtime = array('q')
+        self.dir_first = array('q')
+        self.dir_files = array('q')
+        self.dir_names_start = array('q')
+        self.dir_name_len = array('I')
+        self.dir_names = bytearray()
+        self.file_size = array('q')
+        self.file_mtime = array('q')
+        self.file_name_len = array('I')
+        self.file_names = bytearray()
+        # Lookups by path; kept up to date while building, rebuilt after loading
+        self._paths = {}
+        self._names = []
+        self._children = {}
+
+    @property
+    def file_count(self):
+        return len(self.file_size)
+
+    @property
+    def dir_count(self):
+        return len(self.dir_parent)
+
+    def add_dir(self, relative, parent, mtime_ns):
+        """Append the folder at ``relative`` (bytes); its files must be added next. Returns its index"""
+        if self._paths is None:
+            self._build_paths()
+        name = os.path.basename(relative)
+        index = len(self.dir_parent)
+        self.dir_parent.append(parent)
+        self.dir_mtime.append(mtime_ns)
+        self.dir_first.append(len(self.file_size))
+        self.dir_files.append(0)
+        self.dir_names_start.append(len(self.file_names))
+        self.dir_name_len.append(len(name))
+        self.dir_names += name
+        self._paths[relative] = index
+        self._names.append(name)
+        self._children.setdefault(parent, []).append(index)
+        return index
+
+    def add_file(self, name, size, mtime_ns):
+        """Append a file to the most recently added folder"""
+        self.file_size.append(size)
+        self.file_mtime.append(mtime_ns)
+        self.file_name_len.append(len(name))
+        self.file_names += name
+        self.dir_files[-1] += 1
+
+    def copy_files(self, other, index):
+        """Append folder ``index`` of ``other``'s files to the most recent folder, unchanged"""
+        first, count = other.dir_first[index], other.dir_files[index]
+        start = other.dir_names_start[index]
+        lengths = other.file_name_len[first:first + count]
+        self.file_size.extend(other.file_size[first:first + count])
+        self.file_mtime.extend(other.file_mtime[first:first + count])
+        self.file_name_len.extend(lengths)
+        self.file_names += other.file_names[start:start + sum(lengths)]
+        self.dir_files[-1] += count
+
+    def files(self, index):
+        """{name bytes: (size, mtime_ns)} for the files directly in folder ``index``"""
+        first, count = self.dir_first[index], self.dir_files[index]
+        position = self.dir_names_start[index]
+        result = {}
+        for i in range(first, first + count):
+            end = position + self.file_name_len[i]
+            result[bytes(self.file_names[position:end])] = (self.file_size[i], self.file_mtime[i])
+            position = end
+        return result
+
+    def _build_paths(self):
+        paths, names, children = [], [], {}
+        position = 0
+        for index, parent in enumerate(self.dir_parent):
+            end = position + self.dir_name_len[index]
+            name = bytes(self.dir_names[position:end])
+            position = end
+            names.append(name)
+            paths.append(os.path.join(paths[parent], name) if parent >= 0 else b'')
+            children.setdefault(parent, []).append(index)
+        self._paths = {path: index for index, path in enumerate(paths)}
+        self._names = names
+        self._children = children
+
+    def find(self, relative):
+        """Index of the folder at ``relative`` (bytes, b'' for the root), or None"""
+        if self._paths is None:
+            self._build_paths()
+        return self._paths.get(relative)
+
+    def paths(self):
+        """{relative path: folder index} for every folder"""
+        if self._paths is None:
+            self._build_paths()
+        return self._paths
+
+    def child_names(self, index):
+        if self._children is None:
+            self._build_paths()
+        return [self._names[child] for child in self._children.get(index, ())]
+
+    def save(self, path):
+        """Write the snapshot atomically"""
+        root = os.fsencode(self.root)
+        header = HEADER.pack(MAGIC, b'l' if sys.byteorder == 'little' else b'b', len(root), self.created,
+                             self.dir_count, self.file_count, len(self.dir_names), len(self.file_names))
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(root)
+                for values in (self.dir_parent, self.dir_mtime, self.dir_first, self.dir_files,
+                               self.dir_names_start, self.dir_name_len, self.file_size,
+                               self.file_mtime, self.file_name_len):
+                    values.tofile(f)
+                f.write(self.dir_names)
+                f.write(self.file_names)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Read a snapshot written by :meth:`save`; raises ValueError if it isn't one"""
+        with open(path, 'rb') as f:
+            data = f.read(HEADER.size)
+            if len(data) < HEADER.size:
+                raise ValueError(f"{path} is not a library snapshot")
+            magic, order, root_len, created, dirs, files, dir_bytes, file_bytes = HEADER.unpack(data)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a library snapshot")
+            snapshot = cls(os.fsdecode(f.read(root_len)), created)
+
+            def read(values, count):
+                values.fromfile(f, count)
+                if order != (b'l' if sys.byteorder == 'little' else b'b'):
+                    values.byteswap()
+                return values
+
+            for name in ('dir_parent', 'dir_mtime', 'dir_first', 'dir_files', 'dir_names_start'):
+                read(getattr(snapshot, name), dirs)
+            read(snapshot.dir_name_len, dirs)
+            for name in ('file_size', 'file_mtime'):
+                read(getattr(snapshot, name), files)
+            read(snapshot.file_name_len, files)
+            snapshot.dir_names = bytearray(f.read(dir_bytes))
+            snapshot.file_names = bytearray(f.read(file_bytes))
+        snapshot._paths = snapshot._names = snapshot._children = None
+        return snapshot
+
+
+def list_directory(path):
+    """mtime, files [(name, size, mtime)] and subfolder names of one folder (names as bytes)"""
+    files, subdirs, errors = [], [], 0
+    mtime = os.stat(path).st_mtime_ns
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                errors += 1
+    return mtime, files, subdirs, errors
+
+
+class ChangeReport:
+    """Result of one snapshot pass"""
+
+    def __init__(self):
+        self.files = 0
+        self.directories = 0
+        self.reused_directories = 0
+        self.added = 0
+        self.removed = 0
+        self.modified = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.previous_created = None
+        self.cancelled = False
+        self.deep = False
+
+    @property
+    def changes(self):
+        return self.added + self.removed + self.modified
+
+    def changes_per_day(self):
+        """Changed files per day since the previous snapshot
+
+        None for the first pass, or when the previous one is too recent
+        for a meaningful rate.
+        """
+        if self.previous_created is None:
+            return None
+        seconds = time.time() - self.previous_created
+        if seconds < MIN_RATE_SECONDS:
+            return None
+        return self.changes / (seconds / 86400)
+
+
+class SnapshotScanner:
+    """Compare a music folder with its last snapshot, then replace the snapshot
+
+    ``progress(report)`` is called from the thread running :meth:`run`
+    at most every ``progress_interval`` seconds.
+    """
+
+    def __init__(self, root, data_folder, deep=False, workers=DEFAULT_WORKERS, progress=None,
+                 progress_interval=0.2):
+        self.root = os.path.abspath(root)
+        self.data_folder = data_folder
+        self.deep = deep
+        self.workers = workers
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self._cancel = threading.Event()
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.data_folder, SNAPSHOT_FILE)
+
+    @property
+    def history_path(self):
+        return os.path.join(self.data_folder, HISTORY_FILE)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def load_previous(self):
+        """The last snapshot of this music folder, or None"""
+        try:
+            previous = LibrarySnapshot.load(self.snapshot_path)
+        except (OSError, ValueError):
+            return None
+        return previous if previous.root == self.root else None
+
+    def _visit(self, relative, previous):
+        """Worker: (relative, mtime, files or None if unchanged, subfolder names, errors)"""
+        path = os.path.join(os.fsencode(self.root), relative) if relative else os.fsencode(self.root)
+        index = previous.find(relative) if previous is not None else None
+        if index is not None and not self.deep:
+            mtime = os.stat(path).st_mtime_ns
+            if mtime == previous.dir_mtime[index]:
+                return relative, mtime, None, previous.child_names(index), 0
+        mtime, files, subdirs, errors = list_directory(path)
+        return relative, mtime, files, subdirs, errors
+
+    def run(self):
+        """Walk the tree; returns a ChangeReport. The snapshot is only replaced if not cancelled"""
+        if not os.path.isdir(self.root):
+            raise NotADirectoryError(f"Music folder not found: {self.root}")
+        start = time.perf_counter()
+        previous = self.load_previous()
+        if previous is not None:
+            # Build the path lookup once, before workers share it
+            previous.paths()
+        snapshot = LibrarySnapshot(self.root)
+        report = ChangeReport()
+        report.deep = self.deep
+        report.previous_created = previous.created if previous is not None else None
+        last_report = start
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {executor.submit(self._visit, b'', previous)}
+            while pending:
+                done, pending = wait(pending, timeout=self.progress_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        relative, mtime, files, subdirs, errors = future.result()
+                    except OSError:
+                        # The folder vanished or can't be read; its files count as removed
+                        report.errors += 1
+                        continue
+                    self._record(snapshot, previous, report, relative, mtime, files, errors)
+                    if not self._cancel.is_set():
+                        pending.update(executor.submit(self._visit, os.path.join(relative, name), previous)
+                                       for name in subdirs)
+                if self._cancel.is_set():
+                    for future in pending:
+                        future.cancel()
+                    report.cancelled = True
+                    break
+                now = time.perf_counter()
+                if self.progress is not None and now - last_report >= self.progress_interval:
+                    report.seconds = now - start
+                    self.progress(report)
+                    last_report = now
+
+        if not report.cancelled:
+            if previous is not None:
+                # Folders that weren't reached any more, with everything in them
+                current = snapshot.paths()
+                for relative, index in previous.paths().items():
+                    if relative not in current:
+                        report.removed += previous.dir_files[index]
+            os.makedirs(self.data_folder, exist_ok=True)
+            snapshot.save(self.snapshot_path)
+        report.seconds = time.perf_counter() - start
+        if not report.cancelled:
+            self._append_history(report)
+        if self.progress is not None:
+            self.progress(report)
+        return report
+
+    def _record(self, snapshot, previous, report, relative, mtime, files, errors):
+        parent = snapshot.find(os.path.dirname(relative)) if relative else -1
+        snapshot.add_dir(relative, parent, mtime)
+        index = previous.find(relative) if previous is not None else None
+        report.directories += 1
+        report.errors += errors
+        if files is None:
+            snapshot.copy_files(previous, index)
+            report.reused_directories += 1
+        else:
+            known = previous.files(index) if index is not None else {}
+            for name, size, file_mtime in files:
+                snapshot.add_file(name, size, file_mtime)
+                old = known.pop(name, None)
+                if previous is None:
+                    continue
+                if old is None:
+                    report.added += 1
+                elif old != (size, file_mtime):
+                    report.modified += 1
+            report.removed += len(known)
+        report.files = snapshot.file_count
+
+    def _append_history(self, report):
+        new_file = not os.path.exists(self.history_path)
+        with open(self.history_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(HISTORY_FIELDS)
+            writer.writerow([time.strftime('%Y-%m-%dT%H:%M:%S'), report.files, report.added,
+                             report.removed, report.modified, f"{report.seconds:.2f}",
+                             int(report.deep)])
+
+
+def load_history(data_folder):
+    """Rows of the churn history as dicts (newest last); empty if there is none"""
+    try:
+        with open(os.path.join(data_folder, HISTORY_FILE), newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    except OSError:
+        return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report what changed in a music folder since the last run")
+    parser.add_argument('music_folder')
+    parser.add_argument('data_folder', help="where the snapshot and churn history are kept")
+    parser.add_argument('--deep', action='store_true', help="check every file, not just changed folders")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    scanner = SnapshotScanner(args.music_folder, args.data_folder, deep=args.deep, workers=args.workers)
+    report = scanner.run()
+    print(f"{report.files:,} files in {report.directories:,} folders "
+          f"({report.reused_directories:,} unchanged) checked in {format_duration(report.seconds)}")
+    if report.previous_created is None:
+        print("First snapshot saved; run again later to see changes.")
+    else:
+        rate = report.changes_per_day()
+        print(f"Added {report.added:,}, removed {report.removed:,}, modified {report.modified:,}"
+              + (f" ({rate:,.1f} changes/day)" if rate is not None else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
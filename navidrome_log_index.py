@@ -0,0 +1,253 @@
+"""Line and log-level index over a Navidrome log file of any size."""
+import argparse
+import bisect
+import itertools
+import os
+import re
+import sys
+import threading
+from array import array
+
+# Level codes stored per line; lines without a level (stack traces,
+# wrapped output) inherit the level of the line before them
+LEVELS = ('unknown', 'trace', 'debug', 'info', 'warn', 'error', 'fatal')
+LEVEL_CODES = {name: code for code, name in enumerate(LEVELS)}
+LEVEL_ALIASES = {
+    b'trace': 1, b'trac': 1, b'debug': 2, b'debu': 2, b'info': 3, b'warn': 4, b'warning': 4,
+    b'error': 5, b'erro': 5, b'fatal': 6, b'fata': 6, b'panic': 6, b'pani': 6,
+}
+
+# logrus text format, as written to LogFile ('level=info') or to a
+# terminal ('INFO[0000]'); only the start of a line is searched
+LEVEL_RE = re.compile(rb'level=(\w+)|^([A-Z]{4})\[')
+LEVEL_SEARCH_BYTES = 120
+
+# Bytes indexed per step; bounds memory for the temporary line splits
+CHUNK_BYTES = 8 * 1024 * 1024
+
+# Longest line returned for display
+MAX_LINE_CHARS = 4000
+
+
+def level_code(line):
+    match = LEVEL_RE.search(line, 0, LEVEL_SEARCH_BYTES)
+    if match is None:
+        return None
+    return LEVEL_ALIASES.get((match.group(1) or match.group(2)).lower(), 0)
+
+
+class LogIndex:
+    """Incrementally built index of line offsets and levels for one file
+
+    :meth:`update` may run on a background thread while another thread
+    reads lines; both take the index's lock around shared state.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = array('q')
+        self.levels = bytearray()
+        # Byte offset just past the last complete, indexed line
+        self.end = 0
+        self.generation = 0
+        self._inode = None
+        self._file = None
+        self._updating = False
+        self._closed = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        """Close the file; deferred to the end of a running update"""
+        with self._lock:
+            self._closed = True
+            if not self._updating:
+                self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _reset(self):
+        self._close_file()
+        self.offsets = array('q')
+        self.levels = bytearray()
+        self.end = 0
+        # Lets readers notice that line numbers changed meaning
+        self.generation += 1
+
+    def _read(self, offset, length, file=None):
+        # Positioned reads rather than a memory map: if the log is truncated
+        # (logrotate's copytruncate) a read comes back short instead of
+        # killing the process with SIGBUS
+        file = file or self._file
+        if hasattr(os, 'pread'):
+            return os.pread(file.fileno(), length, offset)
+        with self._lock:
+            file.seek(offset)
+            return file.read(length)
+
+    def update(self, progress=None, cancelled=None):
+        """Index lines appended since the last call; returns the number of new lines
+
+        ``progress(lines, bytes_done, bytes_total)`` is called after each
+        chunk and ``cancelled()`` is checked between chunks. Only one
+        update runs at a time; a concurrent call returns 0 at once.
+        """
+        with self._lock:
+            if self._updating or self._closed:
+                return 0
+            try:
+                stat = os.stat(self.path)
+                size, inode = stat.st_size, stat.st_ino
+            except OSError:
+                size, inode = 0, None
+            if inode != self._inode or size < self.end:
+                # Truncated, or rotated to a new file
+                self._reset()
+                self._inode = inode
+            if size == 0 or size == self.end:
+                return 0
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            start_lines = len(self.offsets)
+            self._updating = True
+        try:
+            self._index(size, progress, cancelled)
+        finally:
+            with self._lock:
+                self._updating = False
+                if self._closed:
+                    self._close_file()
+        return len(self.offsets) - start_lines
+
+    def _index(self, size, progress, cancelled):
+        previous = self.levels[-1] if self.levels else 0
+        position = self.end
+        while position < size and not self._closed:
+            if cancelled is not None and cancelled():
+                break
+            chunk = self._read(position, min(CHUNK_BYTES, size - position))
+            stop = chunk.rfind(b'\n')
+            while stop < 0 and position + len(chunk) < size:
+                # A line longer than a chunk
+                more = self._read(position + len(chunk), min(CHUNK_BYTES, size - position - len(chunk)))
+                if not more:
+                    break
+                stop = more.find(b'\n')
+                stop = stop if stop < 0 else len(chunk) + stop
+                chunk += more
+            if stop < 0:
+                # The unfinished last line, or the file was truncated
+                break
+            offsets = array('q')
+            levels = bytearray()
+            for line in chunk[:stop + 1].split(b'\n')[:-1]:
+                offsets.append(position)
+                code = level_code(line)
+                previous = previous if code is None else code
+                levels.append(previous)
+                position += len(line) + 1
+            with self._lock:
+                self.offsets.extend(offsets)
+                self.levels.extend(levels)
+                self.end = position
+            if progress is not None:
+                progress(len(self.offsets), position, size)
+
+    def _line_end(self, number):
+        return self.offsets[number + 1] if number + 1 < len(self.offsets) else self.end
+
+    def lines(self, numbers):
+        """Decoded text of the given line numbers, without newlines"""
+        with self._lock:
+            result = []
+            if self._file is None:
+                return result
+            for number in numbers:
+                if number >= len(self.offsets):
+                    break
+                start = self.offsets[number]
+                raw = self._read(start, min(self._line_end(number) - start, MAX_LINE_CHARS * 4))
+                text = raw.rstrip(b'\r\n').decode('utf-8', 'replace')
+                result.append(text if len(text) <= MAX_LINE_CHARS else text[:MAX_LINE_CHARS] + ' ...')
+            return result
+
+    def matching_lines(self, min_level=0, text=None, start=0, stop=None):
+        """Numbers of lines at or above ``min_level`` containing ``text``, in [start, stop)"""
+        # Searches work on a copy of the range, so a long one doesn't keep
+        # lines() (and the viewer redrawing) waiting for the lock
+        with self._lock:
+            count = len(self.offsets) if stop is None else min(stop, len(self.offsets))
+            if start >= count or self._file is None:
+                return []
+            offsets = self.offsets[start:count]
+            levels = self.levels[start:count]
+            end = self._line_end(count - 1)
+            file = self._file
+        if text:
+            numbers = self._search(text.encode('utf-8'), file, offsets, start, end)
+            if min_level:
+                numbers = [n for n in numbers if levels[n - start] >= min_level]
+            return numbers
+        if not min_level:
+            return list(range(start, count))
+        # One byte per line: 1 if the level passes, 0 otherwise
+        table = bytes(1 if code >= min_level else 0 for code in range(256))
+        return list(itertools.compress(range(start, count), levels.translate(table)))
+
+    def _search(self, needle, file, offsets, first, end):
+        """Numbers of lines containing ``needle``; ``offsets`` starts at line ``first``"""
+        numbers = []
+        index = 0
+        position = offsets[0]
+        while position < end:
+            wanted = min(CHUNK_BYTES, end - position)
+            try:
+                chunk = self._read(position, wanted, file)
+            except (OSError, ValueError):
+                # Closed, or rotated and reset, while searching
+                break
+            at = 0
+            while True:
+                found = chunk.find(needle, at)
+                if found < 0:
+                    break
+                # Matches only move forward, so the search can start at the last line
+                index = bisect.bisect_right(offsets, position + found, index) - 1
+                numbers.append(first + index)
+                # Continue after this line so each line is reported once
+                at = (offsets[index + 1] if index + 1 < len(offsets) else end) - position
+            if len(chunk) < wanted:
+                # Truncated since it was indexed
+                break
+            # Overlap the next chunk so matches across the boundary are found
+            position += max(at, len(chunk) - len(needle) + 1, 1)
+        return numbers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index a Navidrome log and print matching lines")
+    parser.add_argument('log_file')
+    parser.add_argument('--level', choices=LEVELS[1:], help="minimum level to show")
+    parser.add_argument('--grep', help="only lines containing this text")
+    parser.add_argument('--tail', type=int, default=50, help="print the last N matches (0: all)")
+    args = parser.parse_args(argv)
+
+    index = LogIndex(args.log_file)
+    index.update()
+    numbers = index.matching_lines(LEVEL_CODES[args.level] if args.level else 0, args.grep)
+    print(f"{len(index):,} lines, {len(numbers):,} matching", file=sys.stderr)
+    if args.tail:
+        numbers = numbers[-args.tail:]
+    for line in index.lines(numbers):
+        print(line)
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""Latency and health poller for a running Navidrome server.
+
+``--stand-in`` runs a small local server for testing without Navidrome.
+"""
+import argparse
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Navidrome's health check and the Subsonic API ping. The Subsonic ping
+# answers (with an authentication error) even without credentials, which is
+# enough to measure the API's latency.
+DEFAULT_ENDPOINTS = ('/ping', '/rest/ping.view?u=navigui&v=1.16.1&c=navigui&f=json')
+
+DEFAULT_CAPACITY = 300
+
+
+def server_base_url(address, port):
+    """URL for reaching a server that listens on ``address``:``port`` from this machine"""
+    address = (address or '').strip()
+    if address in ('', '0.0.0.0', '::', '[::]'):
+        address = '127.0.0.1'
+    elif ':' in address and not address.startswith('['):
+        address = f'[{address}]'
+    return f'http://{address}:{port}'
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRing:
+    """Fixed-size ring buffer of (timestamp, latency, ok) samples, safe across threads"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._latencies = array('d', bytes(8 * capacity))
+        self._ok = bytearray(capacity)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp, latency, ok):
+        with self._lock:
+            i = self._next
+            self._times[i] = timestamp
+            self._latencies[i] = latency
+            self._ok[i] = 1 if ok else 0
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def __len__(self):
+        return self._count
+
+    def samples(self):
+        """(timestamp, latency, ok) tuples, oldest first"""
+        with self._lock:
+            start = (self._next - self._count) % self.capacity
+            indexes = [(start + k) % self.capacity for k in range(self._count)]
+            return [(self._times[i], self._latencies[i], bool(self._ok[i])) for i in indexes]
+
+    def summary(self):
+        """Dict with sample count, error rate and p50/p95/p99 of successful requests (seconds)"""
+        samples = self.samples()
+        latencies = sorted(latency for _, latency, ok in samples if ok)
+        errors = len(samples) - len(latencies)
+        return {
+            'samples': len(samples),
+            'error_rate': errors / len(samples) if samples else 0.0,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+        }
+
+
+class ServerPoller:
+    """Poll ``endpoints`` under ``base_url`` every ``interval`` seconds on a daemon thread
+
+    ``on_sample(endpoint, latency, ok, detail)`` is called from the poller
+    thread after every request, if given.
+    """
+
+    def __init__(self, base_url, endpoints=DEFAULT_ENDPOINTS, interval=1.0, ring=None,
+                 on_sample=None):
+        self.base_url = base_url.rstrip('/')
+        self.endpoints = list(endpoints)
+        self.interval = interval
+        self.ring = ring or LatencyRing()
+        self.on_sample = on_sample
+        self.last_detail = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def timeout(self):
+        # Never let one request hold up the next round
+        return max(0.2, min(5.0, self.interval * 0.8))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="server-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def request(self, endpoint):
+        """Time one request; returns (latency seconds, ok, detail)"""
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(self.base_url + endpoint, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, OSError) as e:
+            reason = getattr(e, 'reason', e)
+            return time.perf_counter() - start, False, str(reason)
+        latency = time.perf_counter() - start
+        # 4xx still proves the server is up and answering
+        return latency, status < 500, f"HTTP {status}"
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            for endpoint in self.endpoints:
+                if self._stop.is_set():
+                    return
+                latency, ok, detail = self.request(endpoint)
+                self.ring.append(time.time(), latency, ok)
+                self.last_detail = f"{endpoint.split('?')[0]}: {detail}"
+                if self.on_sample is not None:
+                    self.on_sample(endpoint, latency, ok, detail)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    delay = 0.01
+    jitter = 0.02
+    error_rate = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay + random.random() * self.jitter)
+        if random.random() < self.error_rate:
+            self.send_error(503, "Stand-in failure")
+            return
+        path = self.path.split('?')[0]
+        if path == '/ping':
+            body = b'.'
+        elif path.startswith('/rest/ping'):
+            body = b'{"subsonic-response":{"status":"ok","version":"1.16.1"}}'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in_server(port=0, delay=0.01, jitter=0.02, error_rate=0.0):
+    """Serve Navidrome-like ping endpoints on 127.0.0.1 in a background thread
+
+    Returns the server; its port is ``server.server_address[1]`` and it is
+    stopped with ``server.shutdown()``.
+    """
+    handler = type('StandInHandler', (_StandInHandler,),
+                   {'delay': delay, 'jitter': jitter, 'error_rate': error_rate})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, name="stand-in-server", daemon=True).start()
+    return server
+
+
+def format_latency(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll a Navidrome server and report latency percentiles")
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4533)
+    parser.add_argument('-i', '--interval', type=float, default=1.0, help="seconds between polls")
+    parser.add_argument('-n', '--count', type=int, default=0, help="stop after this many polls (0: forever)")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="start a local stand-in server on --port and poll it")
+    parser.add_argument('--stand-in-delay', type=float, default=0.01)
+    parser.add_argument('--stand-in-error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.stand_in:
+        server = start_stand_in_server(args.port, args.stand_in_delay,
+                                       error_rate=args.stand_in_error_rate)
+        args.address, args.port = server.server_address[:2]
+
+    poller = ServerPoller(server_base_url(args.address, args.port), interval=args.interval)
+    poller.start()
+    rounds = 0
+    try:
+        while not args.count or rounds < args.count:
+            time.sleep(args.interval)
+            rounds += 1
+            stats = poller.ring.summary()
+            print(f"p50 {format_latency(stats['p50'])}  p95 {format_latency(stats['p95'])}  "
+                  f"p99 {format_latency(stats['p99'])}  errors {stats['error_rate']:.0%}  "
+                  f"({poller.last_detail})", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.stop()
+        if server is not None:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Opt-in tracing of Tk callbacks and event-loop lag.
+
+Must be enabled before the windows are built, because callbacks are
+wrapped when they are registered.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tkinter
+from collections import deque
+
+# Set to an output path to enable tracing without the command-line option
+TRACE_ENV = 'NAVIGUI_TRACE'
+
+# Callbacks and event-loop stalls longer than this are printed (ms)
+DEFAULT_THRESHOLD_MS = 50.0
+
+# Interval of the event-loop lag heartbeat (ms)
+DEFAULT_HEARTBEAT_MS = 100
+
+# Trace events kept; the oldest are dropped on very long sessions
+MAX_EVENTS = 500000
+
+# Tkinter's internal wrapper for after() callbacks; after() itself is
+# patched instead so the scheduled function's own name is recorded
+_AFTER_WRAPPER = 'Misc.after.<locals>.callit'
+
+
+def callback_name(func):
+    """Readable name for a callback, with its source location"""
+    target = getattr(func, '__func__', func)
+    name = getattr(target, '__qualname__', None) or type(func).__qualname__
+    owner = getattr(func, '__self__', None)
+    if owner is not None and not isinstance(owner, type):
+        name = f"{type(owner).__name__}.{target.__name__}"
+    code = getattr(target, '__code__', None)
+    if code is not None:
+        name += f" ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+class TkTracer:
+    """Collects callback durations and heartbeat lag as Chrome trace events"""
+
+    def __init__(self, output=None, threshold_ms=DEFAULT_THRESHOLD_MS,
+                 heartbeat_ms=DEFAULT_HEARTBEAT_MS):
+        self.output = output
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.slow_callbacks = 0
+        self.max_lag = 0.0
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._originals = None
+
+    def _timestamp(self, seconds):
+        return round((seconds - self._origin) * 1e6, 1)
+
+    def wrap(self, func, name=None):
+        """Return ``func`` wrapped to record each call"""
+        name = name or callback_name(func)
+        events = self.events
+
+        def traced(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                end = time.perf_counter()
+                events.append({'name': name, 'cat': 'callback', 'ph': 'X', 'pid': self._pid,
+                               'tid': threading.get_ident(), 'ts': self._timestamp(start),
+                               'dur': round((end - start) * 1e6, 1)})
+                if end - start > self.threshold:
+                    self.slow_callbacks += 1
+                    print(f"[trace] slow callback {(end - start) * 1000:.1f} ms: {name}", file=sys.stderr)
+
+        traced.__name__ = getattr(func, '__name__', type(func).__name__)
+        return traced
+
+    def install(self):
+        """Patch tkinter so callbacks registered from now on are traced"""
+        if self._originals is not None:
+            return
+        original_register, original_after = tkinter.Misc._register, tkinter.Misc.after
+        original_variable_register = tkinter.Variable._register
+        self._originals = (original_register, original_after, original_variable_register)
+        tracer = self
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            if getattr(func, '__qualname__', None) != _AFTER_WRAPPER:
+                func = tracer.wrap(func)
+            return original_register(widget, func, subst, needcleanup)
+
+        def after(widget, ms, func=None, *args):
+            if func is not None:
+                func = tracer.wrap(func)
+            return original_after(widget, ms, func, *args)
+
+        # Variable traces have their own registration function
+        def variable_register(variable, callback):
+            return original_variable_register(variable, tracer.wrap(callback))
+
+        tkinter.Misc._register = tkinter.Misc.register = _register
+        tkinter.Misc.after = after
+        tkinter.Variable._register = variable_register
+
+    def uninstall(self):
+        if self._originals is not None:
+            register, after, variable_register = self._originals
+            tkinter.Misc._register = tkinter.Misc.register = register
+            tkinter.Misc.after = after
+            tkinter.Variable._register = variable_register
+            self._originals = None
+
+    def start_heartbeat(self, widget):
+        """Measure how late a periodic timer fires on ``widget``'s event loop"""
+        # Scheduled with the original after() so the heartbeat isn't traced itself
+        original_after = self._originals[1] if self._originals else tkinter.Misc.after
+        interval = self.heartbeat_ms / 1000
+
+        def beat(expected):
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, lag)
+            self.events.append({'name': 'event loop lag', 'ph': 'C', 'pid': self._pid,
+                                'ts': self._timestamp(now), 'args': {'lag_ms': round(lag * 1000, 2)}})
+            if lag > self.threshold:
+                print(f"[trace] event loop stalled {lag * 1000:.1f} ms", file=sys.stderr)
+            try:
+                original_after(widget, self.heartbeat_ms, beat, time.perf_counter() + interval)
+            except tkinter.TclError:
+                # The window was destroyed
+                pass
+
+        original_after(widget, self.heartbeat_ms, beat, time.perf_counter() + interval)
+
+    def save(self, path=None):
+        """Write the trace as Chrome trace-event JSON"""
+        path = path or self.output
+        if not path:
+            return
+        trace = {
+            'traceEvents': list(self.events),
+            'displayTimeUnit': 'ms',
+            'otherData': {'slow_callbacks': self.slow_callbacks,
+                          'max_lag_ms': round(self.max_lag * 1000, 2),
+                          'threshold_ms': self.threshold * 1000},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        print(f"[trace] {len(trace['traceEvents']):,} events written to {path} "
+              f"({self.slow_callbacks} slow callbacks, max lag {self.max_lag * 1000:.1f} ms)",
+              file=sys.stderr)
+
+
+def enable(output, threshold_ms=DEFAULT_THRESHOLD_MS, heartbeat_ms=DEFAULT_HEARTBEAT_MS):
+    """Start tracing; the trace is saved to ``output`` when the program exits"""
+    tracer = TkTracer(output, threshold_ms, heartbeat_ms)
+    tracer.install()
+    atexit.register(tracer.save)
+    return tracer
@@ -0,0 +1,378 @@
+"""Incremental model of an edited navidrome.toml for the raw TOML editor."""
+import bisect
+import re
+
+from navidrome_config_cache import parse_toml
+from navidrome_config_writer import KEY_RE, format_key, format_value, scan_value, unquote_key
+
+TABLE_RE = re.compile(r'^\s*(\[\[?)\s*([^\]]+?)\s*\]\]?')
+
+# Strings (group 1) and bare literals (group 2) inside a value
+VALUE_TOKEN_RE = re.compile(
+    r'''("""|\'\'\'|"(?:[^"\\]|\\.)*"?|'[^']*'?)'''
+    r'''|(\b(?:true|false|inf|nan)\b|[+-]?\d[\w.:+-]*)''')
+
+ERROR_LINE_RE = re.compile(r'([Ll]ine) (\d+)')
+
+_MISSING = object()
+
+
+def scan_statements(lines, start=0, stop=None):
+    """Yield ``(first, last, kind, name, comment)`` for statements starting in [start, stop)
+
+    ``kind`` is 'key', 'table' (``name`` is the header, '[[' prefixed for
+    arrays of tables) or 'invalid'. ``start`` must be at a statement
+    boundary; a statement starting before ``stop`` is followed to its end.
+    """
+    count = len(lines)
+    stop = count if stop is None else stop
+    i = start
+    while i < min(count, stop):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            i += 1
+            continue
+        if stripped.startswith('['):
+            match = TABLE_RE.match(line)
+            name = (match.group(1)[:-1] + match.group(2)) if match else stripped
+            yield i, i, 'table' if match else 'invalid', name, None
+            i += 1
+            continue
+        match = KEY_RE.match(line)
+        if not match:
+            yield i, i, 'invalid', None, None
+            i += 1
+            continue
+        value_text = line[match.end():]
+        state, comment_at = scan_value(value_text)
+        first = i
+        while (state[0] > 0 or state[1]) and i + 1 < count:
+            i += 1
+            state, comment_at = scan_value(lines[i], state)
+        comment = None
+        if first == i and comment_at is not None:
+            comment = value_text[len(value_text[:comment_at].rstrip()):].rstrip()
+        yield first, i, 'key', unquote_key(match.group(2)), comment
+        i += 1
+
+
+def _shift_error(error, offset, end=None):
+    """Error message with its line numbers moved from a chunk to the whole document
+
+    ``end`` is the line after the chunk, which is what the parser calls the
+    end of the document.
+    """
+    message = str(error)
+    if offset:
+        message = ERROR_LINE_RE.sub(lambda m: f"{m.group(1)} {int(m.group(2)) + offset}", message)
+    if end is not None:
+        message = message.replace("end of document", f"line {end}")
+    return message
+
+
+def error_line(message):
+    """Zero-based line number mentioned in a sync error, or None"""
+    match = ERROR_LINE_RE.search(message or '')
+    return int(match.group(2)) - 1 if match else None
+
+
+class SyncResult:
+    """What an edit of the text changed
+
+    ``changes`` maps top-level keys to their new values, ``removed`` lists
+    keys that are gone, and ``error`` is a message when the text does not
+    parse (nothing else is set then). ``lines`` is the range of lines that
+    was parsed again. ``edits`` are :meth:`TomlTextModel.patch_key` edits,
+    in order, that wrote keys set with :meth:`TomlTextModel.set_key` while
+    the text was broken.
+    """
+
+    def __init__(self, changes=None, removed=(), error=None, lines=(0, 0), full=False):
+        self.changes = changes or {}
+        self.removed = list(removed)
+        self.error = error
+        self.lines = lines
+        self.full = full
+        self.edits = []
+
+
+class TomlTextModel:
+    """Last valid text of the editor with its statements and parsed config"""
+
+    def __init__(self, text):
+        self.lines = text.split('\n')
+        self.config = parse_toml(text)
+        self.statements = list(scan_statements(self.lines))
+        self._firsts = None
+        # Error of the last apply_text(), and keys set while it stood
+        self.error = None
+        self._pending = {}
+
+    def text(self):
+        return '\n'.join(self.lines)
+
+    @property
+    def root_end(self):
+        """Line of the first table header, or the number of lines"""
+        for first, _, kind, _, _ in self.statements:
+            if kind == 'table':
+                return first
+        return len(self.lines)
+
+    def _statement_firsts(self):
+        if self._firsts is None:
+            self._firsts = [statement[0] for statement in self.statements]
+        return self._firsts
+
+    def statement_at(self, line):
+        """The statement covering ``line``, or None"""
+        firsts = self._statement_firsts()
+        index = bisect.bisect_right(firsts, line) - 1
+        if index >= 0 and self.statements[index][1] >= line:
+            return self.statements[index]
+        return None
+
+    def is_continuation(self, line):
+        """True if ``line`` continues a multi-line value"""
+        statement = self.statement_at(line)
+        return statement is not None and statement[0] < line
+
+    def root_entry(self, key):
+        """(first, last, comment) of a top-level key before the first table, or None"""
+        for first, last, kind, name, comment in self.statements:
+            if kind == 'table':
+                return None
+            if kind == 'key' and name == key:
+                return first, last, comment
+        return None
+
+    def _splice(self, start, stop, statements, delta):
+        """Replace statements[start:stop] and move later ones by ``delta`` lines"""
+        tail = [(first + delta, last + delta, kind, name, comment)
+                for first, last, kind, name, comment in self.statements[stop:]] if delta else \
+            self.statements[stop:]
+        self.statements[start:] = list(statements) + tail
+        self._firsts = None
+
+    def apply_text(self, text):
+        """Bring the model up to date with the editor's text; returns a SyncResult
+
+        On a parse error the model keeps the last valid text, so the next
+        call re-checks everything that has been edited since. Keys set
+        with :meth:`set_key` meanwhile are written once the text parses,
+        over whatever the text says for them.
+        """
+        result = self._apply_text(text)
+        self.error = result.error
+        if not result.error and self._pending:
+            pending, self._pending = self._pending, {}
+            for key, value in pending.items():
+                result.changes.pop(key, None)
+                if key in result.removed:
+                    result.removed.remove(key)
+                edit = self.patch_key(key, value)
+                if edit is not None:
+                    result.edits.append(edit)
+        return result
+
+    def _apply_text(self, text):
+        new = text.split('\n')
+        old = self.lines
+        shortest = min(len(old), len(new))
+        lo = 0
+        while lo < shortest and old[lo] == new[lo]:
+            lo += 1
+        if lo == len(old) == len(new):
+            return SyncResult(lines=(lo, lo))
+        suffix = 0
+        while suffix < shortest - lo and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+        delta = len(new) - len(old)
+        old_hi = len(old) - suffix
+
+        # Widen to whole statements, in the old text and in the new one,
+        # until neither has a statement crossing the region's edges
+        firsts = self._statement_firsts()
+        while True:
+            start = bisect.bisect_right(firsts, lo) - 1
+            if start >= 0 and self.statements[start][1] >= lo:
+                lo = self.statements[start][0]
+            else:
+                start += 1
+            stop = start
+            while stop < len(self.statements) and self.statements[stop][0] < max(old_hi, lo + 1):
+                old_hi = max(old_hi, self.statements[stop][1] + 1)
+                stop += 1
+            new_statements = list(scan_statements(new, lo, old_hi + delta))
+            scanned_end = max([old_hi + delta] + [s[1] + 1 for s in new_statements])
+            if scanned_end - delta <= old_hi:
+                break
+            old_hi = scanned_end - delta
+        new_hi = old_hi + delta
+        old_statements = self.statements[start:stop]
+        region = (lo, new_hi)
+
+        for first, _, kind, _, _ in new_statements:
+            if kind == 'invalid':
+                return SyncResult(error=f"Line {first + 1}: expected 'key = value' or '[table]'",
+                                  lines=region)
+        kinds = {s[2] for s in old_statements} | {s[2] for s in new_statements}
+        if 'table' in kinds:
+            # Tables appeared or disappeared: everything after may have moved
+            return self._apply_full(new, region)
+        if lo >= self.root_end and any(s[2] == 'table' for s in self.statements[:start]):
+            return self._apply_table(new, start, stop, new_statements, delta, region)
+        return self._apply_root(new, start, stop, old_statements, new_statements, delta, region)
+
+    def _apply_root(self, new, start, stop, old_statements, new_statements, delta, region):
+        lo, new_hi = region
+        try:
+            values = parse_toml('\n'.join(new[lo:new_hi]))
+        except ValueError as e:
+            return SyncResult(error=_shift_error(e, lo, new_hi), lines=region)
+        old_keys = {s[3] for s in old_statements}
+        new_keys = {s[3] for s in new_statements}
+        if set(values) != new_keys or not old_keys <= set(self.config):
+            # Dotted keys spread over several statements
+            return self._apply_full(new, region)
+        for key in new_keys - old_keys:
+            if key in self.config:
+                return SyncResult(error=f"Duplicate key {key!r}", lines=region)
+
+        changes = {key: value for key, value in values.items()
+                   if self.config.get(key, _MISSING) != value}
+        removed = sorted(old_keys - new_keys)
+        self.lines = new
+        self._splice(start, stop, new_statements, delta)
+        for key in removed:
+            del self.config[key]
+        self.config.update(changes)
+        return SyncResult(changes, removed, lines=region)
+
+    def _apply_table(self, new, start, stop, new_statements, delta, region):
+        # The table holding the edit runs from its header to the next one
+        header = next(s for s in reversed(self.statements[:start]) if s[2] == 'table')
+        following = next((s for s in self.statements[stop:] if s[2] == 'table'), None)
+        name = header[3]
+        if name.startswith('[') or '.' in name or '"' in name or "'" in name:
+            # Arrays of tables and nested tables only make sense as a whole
+            return self._apply_full(new, region)
+        end = following[0] + delta if following else len(new)
+        try:
+            values = parse_toml('\n'.join(new[header[0]:end]))
+        except ValueError as e:
+            return SyncResult(error=_shift_error(e, header[0], end), lines=region)
+        table = values.get(name, {})
+        changes = {name: table} if self.config.get(name) != table else {}
+        self.lines = new
+        self._splice(start, stop, new_statements, delta)
+        self.config.update(changes)
+        return SyncResult(changes, lines=region)
+
+    def _apply_full(self, new, region):
+        text = '\n'.join(new)
+        try:
+            config = parse_toml(text)
+        except ValueError as e:
+            return SyncResult(error=_shift_error(e, 0), lines=region)
+        changes = {key: value for key, value in config.items()
+                   if self.config.get(key, _MISSING) != value}
+        removed = sorted(set(self.config) - set(config))
+        self.lines = new
+        self.config = config
+        self.statements = list(scan_statements(new))
+        self._firsts = None
+        return SyncResult(changes, removed, lines=region, full=True)
+
+    def set_key(self, key, value=_MISSING):
+        """:meth:`patch_key`, or if the text doesn't parse, remember ``value`` for later
+
+        Returns the edit, or None if there is nothing to change yet.
+        """
+        if self.error:
+            self._pending[key] = value
+            return None
+        return self.patch_key(key, value)
+
+    def patch_key(self, key, value=_MISSING):
+        """Set (or, without ``value``, remove) a top-level key in the text
+
+        Returns ``(first_line, line_count, new_lines)``: replace
+        ``line_count`` lines from ``first_line`` with ``new_lines`` to
+        bring an editor showing :meth:`text` up to date. Returns None if
+        the text already says so.
+        """
+        if self.config.get(key, _MISSING) == value or (
+                value is _MISSING and key not in self.config):
+            return None
+        entry = self.root_entry(key)
+        if value is _MISSING:
+            if entry is None:
+                return None
+            first, last, _ = entry
+            edit = (first, last - first + 1, [])
+            statements = []
+        elif entry is not None:
+            first, last, comment = entry
+            indent = KEY_RE.match(self.lines[first]).group(1)
+            line = f"{indent}{format_key(key)} = {format_value(value)}{comment or ''}"
+            edit = (first, last - first + 1, [line])
+            statements = [(first, first, 'key', key, comment)]
+        else:
+            keys = [s for s in self.statements if s[2] == 'key' and s[0] < self.root_end]
+            first = keys[-1][1] + 1 if keys else self.root_end
+            new_lines = [f"{format_key(key)} = {format_value(value)}"]
+            if not keys and first < len(self.lines) and self.lines[first].strip():
+                # Keep a blank line between the new key and the first table
+                new_lines.append('')
+            edit = (first, 0, new_lines)
+            statements = [(first, first, 'key', key, None)]
+
+        first, count, new_lines = edit
+        self.lines[first:first + count] = new_lines
+        index = bisect.bisect_left(self._statement_firsts(), first)
+        stop = index + (1 if count else 0)
+        self._splice(index, stop, statements, len(new_lines) - count)
+        if value is _MISSING:
+            del self.config[key]
+        else:
+            self.config[key] = value
+        return edit
+
+
+def highlight_spans(line, continuation=False):
+    """``(kind, start, end)`` column spans of one line for highlighting
+
+    ``kind`` is 'key', 'table', 'string', 'literal' or 'comment'. Lines that
+    continue a multi-line value are tokenized as a value.
+    """
+    spans = []
+    value_start = 0
+    if not continuation:
+        stripped = line.lstrip()
+        if not stripped:
+            return spans
+        indent = len(line) - len(stripped)
+        if stripped.startswith('#'):
+            return [('comment', indent, len(line))]
+        if stripped.startswith('['):
+            close = line.find(']', indent)
+            end = len(line) if close < 0 else close + (2 if line.startswith(']]', close) else 1)
+            spans.append(('table', indent, end))
+            comment = line.find('#', end)
+            if comment >= 0:
+                spans.append(('comment', comment, len(line)))
+            return spans
+        match = KEY_RE.match(line)
+        if not match:
+            return spans
+        spans.append(('key', match.start(2), match.end(2)))
+        value_start = match.end()
+    _, comment_at = scan_value(line[value_start:])
+    value_end = len(line) if comment_at is None else value_start + comment_at
+    for match in VALUE_TOKEN_RE.finditer(line, value_start, value_end):
+        spans.append(('string' if match.group(1) else 'literal', match.start(), match.end()))
+    if comment_at is not None:
+        spans.append(('comment', value_end, len(line)))
+    return spans
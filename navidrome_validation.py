@@ -0,0 +1,226 @@
+"""Background validation of ports, paths, FFmpeg and cache size."""
+import errno
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from navidrome_config_core import format_size, parse_size
+
+# Result statuses, from best to worst
+OK, WARNING, ERROR = 'ok', 'warning', 'error'
+
+# How long a result stays valid; files and ports change under us
+RESULT_TTL = 30.0
+
+# Results kept at most, oldest dropped first
+CACHE_SIZE = 256
+
+FFMPEG_TIMEOUT = 5.0
+
+
+def _nearest_existing(path):
+    """``path`` or its closest existing parent directory"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def check_port(port, address):
+    try:
+        port = int(port)
+    except (TypeError, ValueError):
+        return ERROR, "not a number"
+    if not 1 <= port <= 65535:
+        return ERROR, "must be 1-65535"
+    host = address if address not in ('', None) else '0.0.0.0'
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.bind((host.strip('[]'), port))
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            return WARNING, "in use (is Navidrome running?)"
+        if e.errno == errno.EACCES:
+            return WARNING, "needs elevated privileges"
+        # Address problems are reported on the Address field
+        if e.errno in (errno.EADDRNOTAVAIL, errno.EAFNOSUPPORT):
+            return OK, ""
+        return WARNING, e.strerror or str(e)
+    return OK, "available"
+
+
+def check_address(address):
+    host = (address or '0.0.0.0').strip('[]')
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.bind((host, 0))
+    except OSError as e:
+        if isinstance(e, socket.gaierror) or e.errno == errno.EADDRNOTAVAIL:
+            return ERROR, "not an address of this machine"
+        return WARNING, e.strerror or str(e)
+    return OK, ""
+
+
+def check_music_folder(path):
+    if not path:
+        return WARNING, "not set"
+    if not os.path.isdir(path):
+        return ERROR, "folder not found"
+    if not os.access(path, os.R_OK | os.X_OK):
+        return ERROR, "not readable"
+    return OK, ""
+
+
+def check_writable_folder(path):
+    """A folder Navidrome writes to; it is created if missing"""
+    if not path:
+        return ERROR, "not set"
+    if os.path.isdir(path):
+        return (OK, "") if os.access(path, os.W_OK | os.X_OK) else (ERROR, "not writable")
+    if os.path.exists(path):
+        return ERROR, "not a folder"
+    parent = _nearest_existing(path)
+    if os.access(parent, os.W_OK):
+        return OK, "will be created"
+    return ERROR, f"cannot be created in {parent}"
+
+
+def check_writable_file(path):
+    """A file Navidrome writes to; it is created if missing"""
+    if not path:
+        return OK, ""
+    if os.path.isdir(path):
+        return ERROR, "is a folder"
+    if os.path.exists(path):
+        return (OK, "") if os.access(path, os.R_OK | os.W_OK) else (ERROR, "not writable")
+    parent = _nearest_existing(os.path.dirname(os.path.abspath(path)))
+    if os.path.isdir(parent) and os.access(parent, os.W_OK):
+        return OK, "will be created"
+    return ERROR, "folder not writable"
+
+
+def check_ffmpeg(path):
+    executable = path or shutil.which('ffmpeg')
+    if not executable:
+        return WARNING, "ffmpeg not found on PATH"
+    try:
+        result = subprocess.run([executable, '-version'], capture_output=True, text=True,
+                                timeout=FFMPEG_TIMEOUT)
+    except FileNotFoundError:
+        return ERROR, "not found"
+    except PermissionError:
+        return ERROR, "not executable"
+    except subprocess.TimeoutExpired:
+        return WARNING, f"no answer within {FFMPEG_TIMEOUT:.0f} s"
+    except OSError as e:
+        return ERROR, e.strerror or str(e)
+    first_line = result.stdout.splitlines()[0] if result.stdout else ''
+    if result.returncode != 0 or not first_line.startswith('ffmpeg'):
+        return ERROR, "not an ffmpeg executable"
+    # "ffmpeg version 6.1.1 Copyright ..." -> "6.1.1"
+    parts = first_line.split()
+    return OK, f"version {parts[2]}" if len(parts) > 2 else ""
+
+
+def check_cache_size(size, data_folder):
+    try:
+        wanted = parse_size(size)
+    except ValueError as e:
+        return ERROR, str(e)
+    # The transcoding cache lives under DataFolder
+    try:
+        free = shutil.disk_usage(_nearest_existing(data_folder or '.')).free
+    except OSError:
+        return OK, ""
+    if free < wanted:
+        return ERROR, f"only {format_size(free)} free"
+    if free < wanted * 2:
+        return WARNING, f"only {format_size(free)} free"
+    return OK, f"{format_size(free)} free"
+
+
+# key -> (check function, other option keys passed after the value)
+CHECKS = {
+    'Port': (check_port, ('Address',)),
+    'Address': (check_address, ()),
+    'DataFolder': (check_writable_folder, ()),
+    'MusicFolder': (check_music_folder, ()),
+    'FFmpegPath': (check_ffmpeg, ()),
+    'TranscodingCacheSize': (check_cache_size, ('DataFolder',)),
+    'DbPath': (check_writable_file, ()),
+    'LogFile': (check_writable_file, ()),
+}
+
+# option -> checks that must re-run when it changes
+DEPENDENTS = {}
+for _key, (_, _dependencies) in CHECKS.items():
+    for _dependency in _dependencies:
+        DEPENDENTS.setdefault(_dependency, []).append(_key)
+
+
+class ValidationEngine:
+    """Run checks on a thread pool and cache their results by input
+
+    ``on_result(key, inputs, status, message)`` is called with each result,
+    from a worker thread, or from :meth:`validate`'s caller when the result
+    was cached. ``inputs`` identifies the values checked, so callers can
+    drop results for values that have been edited since.
+    """
+
+    def __init__(self, on_result, workers=4, ttl=RESULT_TTL):
+        self.on_result = on_result
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validation")
+        self._results = OrderedDict()
+        self._running = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def inputs(key, get_value):
+        """The values a check of ``key`` depends on, as a hashable tuple"""
+        _, dependencies = CHECKS[key]
+        return (get_value(key),) + tuple(get_value(name) for name in dependencies)
+
+    def validate(self, key, inputs):
+        """Report the result for ``key`` with ``inputs``, running the check only if needed"""
+        cache_key = (key, inputs)
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self._results.move_to_end(cache_key)
+                result = cached[1]
+            elif cache_key in self._running:
+                return
+            else:
+                self._running.add(cache_key)
+                result = None
+        if result is not None:
+            self.on_result(key, inputs, *result)
+        else:
+            self._executor.submit(self._run, key, inputs)
+
+    def _run(self, key, inputs):
+        check, _ = CHECKS[key]
+        try:
+            result = check(*inputs)
+        except Exception as e:
+            result = (WARNING, f"check failed: {e}")
+        with self._lock:
+            self._running.discard((key, inputs))
+            self._results[(key, inputs)] = (time.monotonic(), result)
+            while len(self._results) > CACHE_SIZE:
+                self._results.popitem(last=False)
+        self.on_result(key, inputs, *result)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
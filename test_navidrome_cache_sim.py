@@ -0,0 +1,81 @@
+"""Tests for the transcoding cache simulator."""
+import os
+import random
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from navidrome_cache_sim import PlayHistory, load_log_history, simulate
+
+
+def lru_hits(plays, track_bytes, capacity):
+    """Hits of a plain byte-capacity LRU cache, evicting the oldest tracks first"""
+    cache = OrderedDict()
+    used = hits = 0
+    for track in plays:
+        if track in cache:
+            hits += 1
+            cache.move_to_end(track)
+            continue
+        cache[track] = track_bytes[track]
+        used += track_bytes[track]
+        while used > capacity:
+            _, size = cache.popitem(last=False)
+            used -= size
+    return hits
+
+
+class SimulateTests(unittest.TestCase):
+
+    def test_hits_match_a_plain_lru(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            tracks = rng.randint(1, 40)
+            durations = {f't{i}': rng.randint(1, 10) for i in range(tracks)}
+            # Skewed popularity, so some tracks repeat often and some rarely
+            plays = [f't{min(int(rng.expovariate(0.15)), tracks - 1)}' for _ in range(rng.randint(1, 400))]
+            history = PlayHistory()
+            for track in plays:
+                history.add(track, durations[track])
+            # 8 kbps is 1000 bytes per second of audio
+            track_bytes = {track: seconds * 1000 for track, seconds in durations.items()}
+            sizes = ['0', '1000', '5000', '12KB', '40KB', '1MB']
+            for result in simulate(history, sizes, bitrate=8):
+                self.assertEqual(result['hits'], lru_hits(plays, track_bytes, result['cache_bytes']),
+                                 result['cache_size'])
+                self.assertEqual(result['hits'] + result['misses'], len(plays))
+
+    def test_transcoded_bytes(self):
+        history = PlayHistory()
+        for track in ['a', 'b', 'a', 'a', 'b']:
+            history.add(track, 2)
+        small, large = simulate(history, ['2000', '4000'], bitrate=8)
+        # One track fits: a, b, a, a (hit), b
+        self.assertEqual((small['hits'], small['transcoded_bytes'], small['retranscoded_bytes']),
+                         (1, 8000, 4000))
+        # Both fit: only the first play of each is transcoded
+        self.assertEqual((large['hits'], large['transcoded_bytes'], large['retranscoded_bytes']),
+                         (3, 4000, 0))
+
+
+class LoadLogHistoryTests(unittest.TestCase):
+
+    def test_raw_streams_skipped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'navidrome.log')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('level=debug msg="Streaming RAW file" id=raw1 path=/music/a.flac\n'
+                        'level=debug msg="Streaming TRANSCODED file" id=t1 path=/music/b.flac\n'
+                        'level=info msg="Scanner: Finished" id=scan\n'
+                        'level=debug msg="Streaming TRANSCODED file" id="t2" duration=100\n'
+                        'level=debug msg="Streaming RAW file" id=t1 path=/music/b.flac\n'
+                        'level=debug msg="Streaming TRANSCODED file" id=t1 path=/music/b.flac\n')
+            history = load_log_history(path)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.track_count, 2)
+        self.assertEqual(list(history.events), [0, 1, 0])
+        self.assertEqual(history.durations[1], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Tests for the in-place TOML writer."""
+import os
+import tempfile
+import unittest
+
+from navidrome_config_cache import parse_toml
+from navidrome_config_writer import atomic_write_text, patch_toml_text, render_config, write_config_file
+
+
+class PatchTomlTextTests(unittest.TestCase):
+
+    def test_comments_and_trailing_comments_kept(self):
+        text = ('# Navidrome settings\n'
+                'Port = 4533  # default port\n'
+                '# where the music lives\n'
+                'MusicFolder = "/music"\n')
+        self.assertEqual(patch_toml_text(text, {'Port': 4600}),
+                         '# Navidrome settings\n'
+                         'Port = 4600  # default port\n'
+                         '# where the music lives\n'
+                         'MusicFolder = "/music"\n')
+
+    def test_crlf_kept(self):
+        text = 'Port = 4533\r\nLogLevel = "INFO"\r\n'
+        self.assertEqual(patch_toml_text(text, {'LogLevel': 'DEBUG'}),
+                         'Port = 4533\r\nLogLevel = "DEBUG"\r\n')
+
+    def test_multiline_value_replaced_whole(self):
+        text = ('Tags = [\n'
+                '  "a",  # first\n'
+                '  "b",\n'
+                ']\n'
+                'Port = 4533\n')
+        result = patch_toml_text(text, {'Tags': ['c']})
+        self.assertEqual(parse_toml(result), {'Tags': ['c'], 'Port': 4533})
+        self.assertTrue(result.endswith('Port = 4533\n'))
+        self.assertNotIn('first', result)
+
+    def test_multiline_string_untouched(self):
+        text = ('Motd = """\n'
+                'Port = 1\n'
+                '"""\n'
+                'Port = 4533\n')
+        result = patch_toml_text(text, {'Port': 4600})
+        self.assertEqual(parse_toml(result), {'Motd': 'Port = 1\n', 'Port': 4600})
+
+    def test_new_key_after_last_root_key(self):
+        text = 'Port = 4533\n\n[LastFM]\nEnabled = true\n'
+        self.assertEqual(patch_toml_text(text, {'EnableDownloads': False}),
+                         'Port = 4533\nEnableDownloads = false\n\n[LastFM]\nEnabled = true\n')
+
+    def test_new_key_before_first_table(self):
+        text = '[LastFM]\nEnabled = true\n'
+        result = patch_toml_text(text, {'Port': 4600})
+        self.assertEqual(result, 'Port = 4600\n\n[LastFM]\nEnabled = true\n')
+        self.assertEqual(parse_toml(result), {'Port': 4600, 'LastFM': {'Enabled': True}})
+
+    def test_removed_optional_key(self):
+        text = 'Port = 4533\nMusicFolder = "/music"  # library\nLogLevel = "INFO"\n'
+        self.assertEqual(patch_toml_text(text, {}, ['MusicFolder']),
+                         'Port = 4533\nLogLevel = "INFO"\n')
+
+    def test_table_value_not_patched(self):
+        self.assertIsNone(patch_toml_text('Port = 4533\n', {'LastFM': {'Enabled': True}}))
+
+    def test_key_only_in_table_not_patched(self):
+        self.assertIsNone(patch_toml_text('[Port]\nx = 1\n', {'Port': 4600}))
+
+
+class WriteConfigFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'navidrome.toml')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    def read(self):
+        with open(self.path, encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def test_patches_existing_file(self):
+        self.write('# mine\r\nPort = 4533  # port\r\n')
+        self.assertTrue(write_config_file(self.path, {'Port': 4600}))
+        self.assertEqual(self.read(), '# mine\r\nPort = 4600  # port\r\n')
+
+    def test_unchanged_file_not_written(self):
+        self.write('# mine\nPort = 4533\n')
+        before = os.stat(self.path)
+        self.assertFalse(write_config_file(self.path, {'Port': 4533}))
+        after = os.stat(self.path)
+        self.assertEqual((before.st_ino, before.st_mtime_ns), (after.st_ino, after.st_mtime_ns))
+
+    def test_removed_key_written(self):
+        self.write('Port = 4533\nLogFile = "/tmp/navidrome.log"\n')
+        self.assertTrue(write_config_file(self.path, {'Port': 4533}))
+        self.assertEqual(self.read(), 'Port = 4533\n')
+
+    def test_new_file_dumped(self):
+        self.assertTrue(write_config_file(self.path, {'Port': 4533, 'LogLevel': 'INFO'}))
+        self.assertEqual(parse_toml(self.read()), {'Port': 4533, 'LogLevel': 'INFO'})
+
+    def test_falls_back_to_full_dump(self):
+        # A table value can't be patched in place, so the whole file is
+        # rewritten and its comments are lost
+        self.write('# mine\nPort = 4533\n')
+        config = {'Port': 4533, 'LastFM': {'Enabled': True}}
+        current_text, new_text = render_config(self.path, config)
+        self.assertEqual(current_text, '# mine\nPort = 4533\n')
+        self.assertNotIn('# mine', new_text)
+        self.assertEqual(parse_toml(new_text), config)
+        self.assertTrue(write_config_file(self.path, config))
+        self.assertEqual(parse_toml(self.read()), config)
+
+
+class AtomicWriteTextTests(unittest.TestCase):
+
+    def test_replaces_content_and_keeps_mode(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'navidrome.toml')
+            with open(path, 'w') as f:
+                f.write('Port = 1\n')
+            os.chmod(path, 0o600)
+            atomic_write_text(path, 'Port = 2\r\n')
+            with open(path, newline='') as f:
+                self.assertEqual(f.read(), 'Port = 2\r\n')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+            self.assertEqual(os.listdir(directory), ['navidrome.toml'])
+
+
+if __name__ == '__main__':
+    unittest.main()
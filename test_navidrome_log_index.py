@@ -0,0 +1,106 @@
+"""Tests for the log line and level index."""
+import os
+import tempfile
+import unittest
+
+import navidrome_log_index
+from navidrome_log_index import LEVEL_CODES, LogIndex
+
+
+class LogIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'navidrome.log')
+        # Small chunks so short test files cross chunk boundaries
+        self.chunk_bytes = navidrome_log_index.CHUNK_BYTES
+        navidrome_log_index.CHUNK_BYTES = 64
+        self.index = LogIndex(self.path)
+
+    def tearDown(self):
+        self.index.close()
+        navidrome_log_index.CHUNK_BYTES = self.chunk_bytes
+        self.directory.cleanup()
+
+    def write(self, lines, mode='w'):
+        with open(self.path, mode, encoding='utf-8', newline='') as f:
+            f.write(''.join(line + '\n' for line in lines))
+
+    def test_lines_and_offsets(self):
+        lines = [f'level=info msg="line {i}"' for i in range(50)]
+        self.write(lines)
+        self.assertEqual(self.index.update(), 50)
+        self.assertEqual(self.index.lines([0, 17, 49]), [lines[0], lines[17], lines[49]])
+
+    def test_unfinished_last_line_waits(self):
+        self.write(['level=info msg="done"'])
+        with open(self.path, 'a') as f:
+            f.write('level=info msg="half')
+        self.assertEqual(self.index.update(), 1)
+        with open(self.path, 'a') as f:
+            f.write(' written"\n')
+        self.assertEqual(self.index.update(), 1)
+        self.assertEqual(self.index.lines([1]), ['level=info msg="half written"'])
+
+    def test_line_longer_than_a_chunk(self):
+        long_line = 'level=warn msg="' + 'x' * 500 + '"'
+        self.write(['level=info msg="a"', long_line, 'level=info msg="b"'])
+        self.assertEqual(self.index.update(), 3)
+        self.assertEqual(self.index.lines([1, 2]), [long_line, 'level=info msg="b"'])
+        self.assertEqual(self.index.levels[1], LEVEL_CODES['warn'])
+
+    def test_continuation_lines_inherit_level(self):
+        self.write(['level=error msg="panic"', 'goroutine 1 [running]:', '  main.go:10',
+                    'level=info msg="ok"', 'trailing text'])
+        self.index.update()
+        self.assertEqual(list(self.index.levels), [LEVEL_CODES[name] for name in
+                                                   ('error', 'error', 'error', 'info', 'info')])
+        self.assertEqual(self.index.matching_lines(LEVEL_CODES['error']), [0, 1, 2])
+
+    def test_needle_across_chunk_boundary(self):
+        # Each line is 40 bytes, so the needle in line 1 straddles byte 64
+        lines = ['level=info msg="padding padding pad"  ..', 'level=info msg="abc NEEDLE def" .......']
+        self.assertEqual([len(line) + 1 for line in lines], [41, 40])
+        self.write(lines * 10)
+        self.index.update()
+        self.assertEqual(self.index.matching_lines(text='NEEDLE'), list(range(1, 20, 2)))
+
+    def test_one_report_per_line(self):
+        self.write(['level=info msg="stream stream stream"', 'level=info msg="none"',
+                    'level=info msg="stream"'])
+        self.index.update()
+        self.assertEqual(self.index.matching_lines(text='stream'), [0, 2])
+
+    def test_text_and_level_filters_combined(self):
+        self.write(['level=debug msg="scan"', 'level=warn msg="scan slow"', 'level=warn msg="other"'])
+        self.index.update()
+        self.assertEqual(self.index.matching_lines(LEVEL_CODES['warn'], 'scan'), [1])
+        self.assertEqual(self.index.matching_lines(text='scan', start=1, stop=2), [1])
+
+    def test_truncate_then_update_starts_over(self):
+        self.write([f'level=info msg="old {i}"' for i in range(20)])
+        self.index.update()
+        generation = self.index.generation
+        with open(self.path, 'w') as f:
+            f.truncate()
+        # Reads before the next update come back empty instead of crashing
+        self.assertEqual(self.index.lines([15]), [''])
+        self.assertEqual(self.index.matching_lines(text='old'), [])
+        self.write(['level=warn msg="new"'], mode='a')
+        self.assertEqual(self.index.update(), 1)
+        self.assertNotEqual(self.index.generation, generation)
+        self.assertEqual(self.index.lines([0]), ['level=warn msg="new"'])
+
+    def test_rotation_starts_over(self):
+        self.write([f'level=info msg="old {i}"' for i in range(20)])
+        self.index.update()
+        generation = self.index.generation
+        os.rename(self.path, self.path + '.1')
+        self.write(['level=info msg="rotated"'] * 30)
+        self.assertEqual(self.index.update(), 30)
+        self.assertNotEqual(self.index.generation, generation)
+        self.assertEqual(self.index.matching_lines(text='old'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
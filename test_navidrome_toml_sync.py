@@ -0,0 +1,124 @@
+"""Tests for the incremental TOML text model behind the editor."""
+import random
+import unittest
+
+from navidrome_config_cache import parse_toml
+from navidrome_config_writer import scan_root_keys
+from navidrome_toml_sync import TomlTextModel
+
+# Lines random edits are made of: keys, comments, tables, multi-line
+# values and lines that break the text
+LINE_POOL = [
+    '',
+    '# a comment',
+    'Port = 4533',
+    'Port = 4600  # custom port',
+    'LogLevel = "INFO"',
+    'LogLevel = "DEBUG"',
+    'MusicFolder = "/music"',
+    'EnableDownloads = false',
+    'ScanSchedule = "@every 1h"  # hourly',
+    'Tags = [',
+    '  "a",  # first',
+    '  "b",',
+    ']',
+    'Motd = """',
+    'Port = 1',
+    '"""',
+    '[LastFM]',
+    'Enabled = true',
+    '[Scanner]',
+    'Extractor = "taglib"',
+    'Port = ',
+    'LogLevel = "unterminated',
+    '= 5',
+]
+
+
+def apply_edit(lines, edit):
+    first, count, new_lines = edit
+    lines[first:first + count] = new_lines
+
+
+class TomlTextModelTests(unittest.TestCase):
+
+    def assertMatchesText(self, model, text):
+        self.assertEqual(model.text(), text)
+        self.assertEqual(model.config, parse_toml(text))
+        entries, root_end = scan_root_keys(text.split('\n'))
+        self.assertEqual(model.root_end, root_end)
+        keys = {name: (first, last, comment) for first, last, kind, name, comment in model.statements
+                if kind == 'key' and first < model.root_end}
+        self.assertEqual(keys, entries)
+
+    def test_random_edits_match_a_full_scan(self):
+        rng = random.Random(11)
+        for _ in range(30):
+            text = 'Port = 4533\nLogLevel = "INFO"  # level\n\n[LastFM]\nEnabled = true\n'
+            model = TomlTextModel(text)
+            lines = text.split('\n')
+            for _ in range(60):
+                before = list(lines)
+                first = rng.randint(0, len(lines))
+                count = rng.randint(0, min(3, len(lines) - first))
+                lines[first:first + count] = rng.choices(LINE_POOL, k=rng.randint(0, 3))
+                text = '\n'.join(lines)
+                result = model.apply_text(text)
+                try:
+                    parse_toml(text)
+                except ValueError:
+                    self.assertIsNotNone(result.error, text)
+                    # Mostly undo the breakage, sometimes keep editing broken text
+                    if rng.random() < 0.8:
+                        lines = before
+                    continue
+                self.assertIsNone(result.error, text)
+                self.assertMatchesText(model, text)
+
+    def test_patch_key_insert_replace_remove(self):
+        text = '# settings\nPort = 4533  # port\n\n[LastFM]\nEnabled = true\n'
+        model = TomlTextModel(text)
+        lines = text.split('\n')
+        apply_edit(lines, model.patch_key('Port', 4600))
+        apply_edit(lines, model.patch_key('LogLevel', 'DEBUG'))
+        self.assertEqual('\n'.join(lines), '# settings\nPort = 4600  # port\nLogLevel = "DEBUG"\n\n'
+                                           '[LastFM]\nEnabled = true\n')
+        self.assertMatchesText(model, '\n'.join(lines))
+        apply_edit(lines, model.patch_key('Port'))
+        self.assertIsNone(model.patch_key('Port'))
+        self.assertIsNone(model.patch_key('LogLevel', 'DEBUG'))
+        self.assertMatchesText(model, '# settings\nLogLevel = "DEBUG"\n\n[LastFM]\nEnabled = true\n')
+
+    def test_set_key_waits_for_broken_text(self):
+        model = TomlTextModel('Port = 4533\nLogLevel = "INFO"\n')
+        broken = 'Port = \nLogLevel = "INFO"\n'
+        self.assertIsNotNone(model.apply_text(broken).error)
+        # Form edits while the text is broken are held back
+        self.assertIsNone(model.set_key('LogLevel', 'DEBUG'))
+        self.assertIsNone(model.set_key('MusicFolder', '/m'))
+        fixed = 'Port = 2\nLogLevel = "WARN"\n'
+        result = model.apply_text(fixed)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.changes, {'Port': 2})
+        # Replaying the edits on the fixed text gives the model's text,
+        # with the form's values winning over the text's
+        lines = fixed.split('\n')
+        for edit in result.edits:
+            apply_edit(lines, edit)
+        self.assertEqual('\n'.join(lines), 'Port = 2\nLogLevel = "DEBUG"\nMusicFolder = "/m"\n')
+        self.assertMatchesText(model, '\n'.join(lines))
+        # Once the text parses, set_key writes straight away
+        self.assertEqual(model.set_key('Port', 3), (0, 1, ['Port = 3']))
+
+    def test_set_key_removal_while_broken(self):
+        model = TomlTextModel('Port = 4533\nMusicFolder = "/music"\n')
+        model.apply_text('Port = 4533\nMusicFolder = "/music\n')
+        self.assertIsNone(model.set_key('MusicFolder'))
+        result = model.apply_text('Port = 4533\nMusicFolder = "/other"\n')
+        self.assertEqual((result.changes, result.removed), ({}, []))
+        self.assertEqual(result.edits, [(1, 1, [])])
+        self.assertMatchesText(model, 'Port = 4533\n')
+
+
+if __name__ == '__main__':
+    unittest.main()